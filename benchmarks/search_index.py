@@ -0,0 +1,83 @@
+"""Measure the in-memory search backend (SEARCH_BACKEND=memory).
+
+Builds an InvertedIndex over N synthetic issues and reports build time and
+per-query latency for a common term, a rare term, a multi-term query, a
+status filter and a follow-up page (cursor), so the cost of the memory
+backend can be compared with the Postgres RPC before choosing it.
+
+    python benchmarks/search_index.py --issues 100000 --runs 20
+"""
+import argparse
+import itertools
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from utils.search_utils import InvertedIndex  # noqa: E402
+
+COMMON = ["road", "water", "street", "light", "garbage", "drain", "park", "school", "bus", "traffic"]
+STATUSES = ["Pending", "In Progress", "Resolved"]
+
+
+def make_issues(count, seed=1):
+    rng = random.Random(seed)
+    # Zipf-like vocabulary: a few very common words and a long tail
+    vocabulary = COMMON + [f"word{i}" for i in range(20000)]
+    cum_weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(vocabulary))))
+
+    def text(words):
+        return " ".join(rng.choices(vocabulary, cum_weights=cum_weights, k=words))
+
+    return [
+        {
+            "id": issue_id,
+            "title": text(6),
+            "location": f"Ward {rng.randint(1, 200)} {text(2)}",
+            "description": text(40),
+            "status": rng.choice(STATUSES),
+        }
+        for issue_id in range(1, count + 1)
+    ]
+
+
+def timed(fn, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--issues", type=int, default=100000)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    issues = make_issues(args.issues)
+    start = time.perf_counter()
+    index = InvertedIndex(issues)
+    print(f"build {len(index)} issues      {(time.perf_counter() - start) * 1000:>9.0f} ms")
+
+    first_page = index.search("road", limit=args.limit)
+    last = first_page[-1]
+    queries = [
+        ("common term", lambda: index.search("road", limit=args.limit)),
+        ("rare term", lambda: index.search("word19999", limit=args.limit)),
+        ("two terms", lambda: index.search("water drain", limit=args.limit)),
+        ("common + status", lambda: index.search("road", status="Pending", limit=args.limit)),
+        ("common, page 2", lambda: index.search("road", limit=args.limit, after=(last["rank"], last["id"]))),
+    ]
+    for label, query in queries:
+        ms, results = timed(query, args.runs)
+        print(f"{label:<22} {ms:>9.2f} ms  ({len(results)} results)")
+
+
+if __name__ == "__main__":
+    main()
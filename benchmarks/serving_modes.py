@@ -0,0 +1,131 @@
+"""Compare API throughput under sync and gevent gunicorn workers.
+
+Starts a stand-in PostgREST server that answers every query after a fixed
+latency, then serves the real app against it with gunicorn, once per worker
+class, and fires concurrent GET /api/issues/<id> requests (one upstream
+round trip each). Sync workers handle one request per process at a time;
+gevent workers keep serving while requests wait on Supabase.
+
+    python benchmarks/serving_modes.py --requests 1000 --concurrency 200 --latency-ms 50
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+ISSUE = json.dumps([{"id": 1, "title": "Pothole", "description": "Main road", "status": "Pending",
+                     "updated_at": "2026-01-01T00:00:00"}]).encode()
+
+
+class FakePostgrest(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    latency = 0.05
+
+    def do_GET(self):
+        time.sleep(self.latency)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(ISSUE)))
+        self.end_headers()
+        self.wfile.write(ISSUE)
+
+    def log_message(self, *args):
+        pass
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_upstream(latency):
+    FakePostgrest.latency = latency
+    server = ThreadingHTTPServer(("127.0.0.1", free_port()), FakePostgrest)
+    server.daemon_threads = True
+    server.request_queue_size = 1024
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def start_app(worker_class, workers, upstream):
+    port = free_port()
+    env = {
+        **os.environ,
+        "SUPABASE_URL": upstream,
+        "SUPABASE_KEY": "bench.bench.bench",
+        "JWT_SECRET_KEY": "bench",
+        "SUMMARIZER_BACKEND": "fake",
+        "WORKER_CLASS": worker_class,
+    }
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "main:app", "--bind", f"127.0.0.1:{port}",
+         "--workers", str(workers), "--worker-class", worker_class,
+         "--worker-connections", "1000", "--backlog", "2048", "--log-level", "warning"],
+        cwd=ROOT, env=env
+    )
+
+    base_url = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            httpx.get(f"{base_url}/api/ping", timeout=1)
+            return proc, base_url
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    proc.terminate()
+    raise RuntimeError(f"gunicorn ({worker_class}) did not start")
+
+
+def run(label, base_url, requests, concurrency):
+    latencies, errors = [], 0
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    with httpx.Client(base_url=base_url, limits=limits, timeout=60) as client:
+        def call(_):
+            start = time.perf_counter()
+            response = client.get("/api/issues/1")
+            return response.status_code, time.perf_counter() - start
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            for status, latency in pool.map(call, range(requests)):
+                latencies.append(latency)
+                errors += status != 200
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] * 1000
+    p95 = latencies[int(len(latencies) * 0.95)] * 1000
+    print(f"{label:<8} {requests / elapsed:>9.1f} req/s  p50 {p50:>8.1f} ms  p95 {p95:>8.1f} ms  {errors} errors")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    args = parser.parse_args()
+
+    upstream = start_upstream(args.latency_ms / 1000)
+    for worker_class in ("sync", "gevent"):
+        proc, base_url = start_app(worker_class, args.workers, upstream)
+        try:
+            run(worker_class, base_url, args.requests, args.concurrency)
+        finally:
+            proc.terminate()
+            proc.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Measure app import time and gunicorn boot time with and without preload.
+
+1. Imports main in a fresh interpreter and reports how long that takes,
+   and how much longer it would take if the Supabase and Cohere clients
+   were still built at import time (as they used to be).
+2. Boots gunicorn with --workers N, once per worker and once with
+   --preload, and reports the time until every worker has loaded the app.
+
+    python benchmarks/startup_time.py --workers 4 --runs 3
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+ENV = {
+    **os.environ,
+    "SUPABASE_URL": "http://127.0.0.1:9",
+    "SUPABASE_KEY": "bench.bench.bench",
+    "JWT_SECRET_KEY": "bench",
+    "COHERE_API_KEY": "bench",
+}
+
+IMPORT_SCRIPT = """
+import time
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+from utils.supabase_utils import get_supabase
+from utils.ai_utils import summarizer
+get_supabase()
+import cohere
+cohere.Client(summarizer.api_key)
+print(imported - start, time.perf_counter() - imported)
+"""
+
+HOOKS = """
+import sys
+
+def post_worker_init(worker):
+    sys.stderr.write("worker-ready\\n")
+    sys.stderr.flush()
+"""
+
+
+def measure_import():
+    out = subprocess.run([sys.executable, "-c", IMPORT_SCRIPT], cwd=ROOT, env=ENV,
+                         capture_output=True, text=True, check=True).stdout
+    imported, clients = map(float, out.split())
+    return imported, clients
+
+
+def measure_boot(workers, preload, hooks):
+    args = [sys.executable, "-m", "gunicorn", "main:app", "--config", hooks,
+            "--bind", "127.0.0.1:0", "--workers", str(workers), "--worker-class", "sync"]
+    if preload:
+        args.append("--preload")
+
+    start = time.perf_counter()
+    proc = subprocess.Popen(args, cwd=ROOT, env=ENV, stderr=subprocess.PIPE, text=True)
+    try:
+        ready = 0
+        for line in proc.stderr:
+            ready += "worker-ready" in line
+            if ready == workers:
+                return time.perf_counter() - start
+        raise RuntimeError("gunicorn exited before all workers were ready")
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    samples = [measure_import() for _ in range(args.runs)]
+    imported = statistics.median(s[0] for s in samples)
+    clients = statistics.median(s[1] for s in samples)
+    print(f"import main (lazy clients)   {imported * 1000:>8.0f} ms")
+    print(f"+ eager Supabase/Cohere      {clients * 1000:>8.0f} ms per process")
+
+    with tempfile.NamedTemporaryFile("w", suffix=".py", delete=False) as f:
+        f.write(HOOKS)
+    try:
+        for preload in (False, True):
+            boot = statistics.median(measure_boot(args.workers, preload, f.name) for _ in range(args.runs))
+            label = f"boot {args.workers} workers" + (" (preload)" if preload else "")
+            print(f"{label:<28} {boot * 1000:>8.0f} ms")
+    finally:
+        os.unlink(f.name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Compare upvote toggle throughput: synchronous RPC vs write-behind buffer.
+
+The write-behind buffer is measured twice: with plain toggles, and with
+the client sending the state it wants ("write-behind+").
+
+Runs against an in-process stand-in for Supabase that models the costs that
+matter under a burst on one issue: every round trip pays network latency,
+and writes touching the same issue serialize on its row lock (the
+upvote_count trigger updates the issue row).
+
+    python benchmarks/upvote_write_behind.py --requests 500 --concurrency 32
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from utils.upvote_utils import UpvoteBuffer  # noqa: E402
+
+
+class Result:
+    def __init__(self, data):
+        self.data = data
+
+
+class Query:
+    def __init__(self, db, table, write=False):
+        self.db = db
+        self.table = table
+        self.write = write
+
+    def __getattr__(self, name):
+        def chain(*args, **kwargs):
+            if name in ("insert", "upsert", "delete", "update"):
+                self.write = True
+            return self
+        return chain
+
+    def execute(self):
+        time.sleep(self.db.latency)
+        if self.write:
+            with self.db.row_lock:
+                time.sleep(self.db.write_cost)
+        self.db.round_trips += 1
+        if self.table == "issue":
+            return Result([{"id": 1, "upvote_count": 0}])
+        if self.table == "rpc":
+            return Result({"upvoted": True, "upvote_count": 1})
+        return Result([])
+
+
+class FakeSupabase:
+    def __init__(self, latency, write_cost):
+        self.latency = latency
+        self.write_cost = write_cost
+        self.row_lock = threading.Lock()
+        self.round_trips = 0
+
+    def table(self, name):
+        return Query(self, name)
+
+    def rpc(self, name, params=None):
+        return Query(self, "rpc", write=True)
+
+
+def run(label, toggle, requests, concurrency, db):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(toggle, range(requests)))
+    elapsed = time.perf_counter() - start
+    print(f"{label:<14} {requests / elapsed:>9.1f} req/s  {elapsed * 1000 / requests:>7.2f} ms/req  {db.round_trips:>5} round trips")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--write-ms", type=float, default=5)
+    parser.add_argument("--flush-ms", type=float, default=250)
+    args = parser.parse_args()
+
+    latency, write_cost = args.latency_ms / 1000, args.write_ms / 1000
+    issue_id = 1
+
+    db = FakeSupabase(latency, write_cost)
+    run("synchronous", lambda user_id: db.rpc("toggle_upvote", {"p_issue_id": issue_id, "p_user_id": user_id}).execute(),
+        args.requests, args.concurrency, db)
+
+    # Plain toggles read each new user's state once; clients that send the
+    # state they want ("upvoted": true) skip that read
+    for label, upvoted in (("write-behind", None), ("write-behind+", True)):
+        db = FakeSupabase(latency, write_cost)
+        buffer = UpvoteBuffer(db, flush_interval=args.flush_ms / 1000)
+        run(label, lambda user_id: buffer.toggle(issue_id, user_id, upvoted), args.requests, args.concurrency, db)
+        buffer.flush()
+        print(f"{'':<14} flushed {buffer.stats['rows_written']} rows in {buffer.stats['flushes']} batches")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 import os
+from datetime import timedelta
 from dotenv import load_dotenv
 import cloudinary
 
@@ -10,7 +11,35 @@ class Config:
     SECRET_KEY = os.getenv("SECRET_KEY", "supersecretkey")
     JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "jwtsecretkey")
 
+    # Access tokens expire after this many seconds (flask-jwt-extended's
+    # default of 15 minutes, now set explicitly so the role TTL can follow it)
+    JWT_ACCESS_TOKEN_EXPIRES = timedelta(seconds=int(os.getenv("JWT_ACCESS_TOKEN_EXPIRES", 900)))
+
+    # Seconds the role claim in a token is trusted after login, and seconds a
+    # role looked up from the database is cached; role changes take effect
+    # within the larger of the two. The claim TTL is capped at the token
+    # lifetime, since a TTL at or above it means the claim is always trusted.
+    ROLE_CLAIM_TTL = min(int(os.getenv("ROLE_CLAIM_TTL", 300)),
+                         int(JWT_ACCESS_TOKEN_EXPIRES.total_seconds()))
+    ROLE_CACHE_TTL = int(os.getenv("ROLE_CACHE_TTL", 60))
+
+    # User profile cache: per worker, plus an optional SQLite file shared by
+    # the workers on one host (unset PROFILE_CACHE_PATH to disable it)
+    PROFILE_CACHE_SIZE = int(os.getenv("PROFILE_CACHE_SIZE", 4096))
+    PROFILE_CACHE_TTL = int(os.getenv("PROFILE_CACHE_TTL", 30))
+    PROFILE_CACHE_PATH = os.getenv("PROFILE_CACHE_PATH", "")
+    PROFILE_STORE_TTL = int(os.getenv("PROFILE_STORE_TTL", 300))
+
     COHERE_API_KEY = os.getenv("COHERE_API_KEY")
+    SUMMARY_CACHE_SIZE = int(os.getenv("SUMMARY_CACHE_SIZE", 512))
+    SUMMARY_CACHE_TTL = int(os.getenv("SUMMARY_CACHE_TTL", 300))
+    SUMMARIZER_BACKEND = os.getenv("SUMMARIZER_BACKEND", "cohere")
+    # Summary jobs running at once across all workers, and seconds before a
+    # job whose worker stopped updating it is failed
+    SUMMARY_MAX_CONCURRENCY = int(os.getenv("SUMMARY_MAX_CONCURRENCY", 2))
+    SUMMARY_JOB_TIMEOUT = int(os.getenv("SUMMARY_JOB_TIMEOUT", 300))
+    SUMMARY_JOB_TTL = int(os.getenv("SUMMARY_JOB_TTL", 600))
+    SUMMARY_CHUNK_CHARS = int(os.getenv("SUMMARY_CHUNK_CHARS", 20000))
 
     # Email Configuration
     EMAIL_HOST = os.getenv("EMAIL_HOST", "smtp.gmail.com")
@@ -18,10 +47,64 @@ class Config:
     EMAIL_USERNAME = os.getenv("EMAIL_USERNAME")
     EMAIL_PASSWORD = os.getenv("EMAIL_PASSWORD")
     EMAIL_FROM = os.getenv("EMAIL_FROM", EMAIL_USERNAME)
+    EMAIL_USE_TLS = os.getenv("EMAIL_USE_TLS", "true").lower() == "true"
+    EMAIL_TIMEOUT = float(os.getenv("EMAIL_TIMEOUT", 10))
+    EMAIL_MAX_RETRIES = int(os.getenv("EMAIL_MAX_RETRIES", 3))
+    # Seconds a worker waits at exit for queued emails to be sent
+    EMAIL_DRAIN_TIMEOUT = float(os.getenv("EMAIL_DRAIN_TIMEOUT", 10))
 
     # Supabase
     SUPABASE_URL = os.getenv("SUPABASE_URL")
     SUPABASE_KEY = os.getenv("SUPABASE_KEY")
+    # Connections per worker process; with gevent workers (gunicorn.conf.py) this
+    # caps how many of the in-flight requests can query Supabase at once
+    SUPABASE_POOL_SIZE = int(os.getenv("SUPABASE_POOL_SIZE", 100))
+    SUPABASE_KEEPALIVE = float(os.getenv("SUPABASE_KEEPALIVE", 60))
+    SUPABASE_TIMEOUT = float(os.getenv("SUPABASE_TIMEOUT", 10))
+    SUPABASE_CONNECT_TIMEOUT = float(os.getenv("SUPABASE_CONNECT_TIMEOUT", 3))
+    SUPABASE_RETRIES = int(os.getenv("SUPABASE_RETRIES", 2))
+    SUPABASE_RETRY_BACKOFF = float(os.getenv("SUPABASE_RETRY_BACKOFF", 0.1))
+
+    # Admin stats
+    STATS_CACHE_TTL = int(os.getenv("STATS_CACHE_TTL", 30))
+    STATS_DAYS = int(os.getenv("STATS_DAYS", 30))
+    STATS_TOP_REPORTERS = int(os.getenv("STATS_TOP_REPORTERS", 5))
+
+    # Admin bulk operations (max ids per request)
+    BULK_MAX_IDS = int(os.getenv("BULK_MAX_IDS", 500))
+
+    # Write-behind upvotes (batched writes under burst load)
+    UPVOTE_WRITE_BEHIND = os.getenv("UPVOTE_WRITE_BEHIND", "false").lower() == "true"
+    UPVOTE_FLUSH_INTERVAL_MS = int(os.getenv("UPVOTE_FLUSH_INTERVAL_MS", 250))
+    UPVOTE_STATE_TTL = int(os.getenv("UPVOTE_STATE_TTL", 300))
+
+    # Seconds clients may reuse a GET response before revalidating it
+    HTTP_CACHE_MAX_AGE = int(os.getenv("HTTP_CACHE_MAX_AGE", 0))
+
+    # Pagination
+    PAGE_SIZE = int(os.getenv("PAGE_SIZE", 20))
+    MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", 100))
+
+    # Issue search: "postgres" (search_issues RPC) or "memory" (in-process index)
+    SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "postgres")
+    SEARCH_INDEX_TTL = int(os.getenv("SEARCH_INDEX_TTL", 60))
+
+    # Nearby issues: "postgres" (nearby_issues RPC) or "grid" (in-process grid index)
+    GEO_BACKEND = os.getenv("GEO_BACKEND", "postgres")
+    GEO_INDEX_TTL = int(os.getenv("GEO_INDEX_TTL", 60))
+    GEO_GRID_CELL_DEG = float(os.getenv("GEO_GRID_CELL_DEG", 0.01))
+    NEARBY_DEFAULT_RADIUS = float(os.getenv("NEARBY_DEFAULT_RADIUS", 2000))
+    NEARBY_MAX_RADIUS = float(os.getenv("NEARBY_MAX_RADIUS", 50000))
+
+    # Threads per worker for running independent upstream calls in parallel
+    # (sync/gthread workers only; gevent workers use one greenlet per call)
+    PARALLEL_WORKERS = int(os.getenv("PARALLEL_WORKERS", 8))
+
+    # Uploads
+    MAX_CONTENT_LENGTH = int(os.getenv("MAX_CONTENT_LENGTH", 10 * 1024 * 1024))
+    UPLOAD_WORKERS = int(os.getenv("UPLOAD_WORKERS", 4))
+    # Direct uploads larger than this (pixels, either side) are scaled down
+    UPLOAD_MAX_DIMENSION = int(os.getenv("UPLOAD_MAX_DIMENSION", 2048))
 
 # Cloudinary Configuration
 cloudinary.config(
@@ -0,0 +1,40 @@
+import multiprocessing
+import os
+
+# ------------------------------------------------------------------
+# Gunicorn settings, picked up automatically by `gunicorn main:app`.
+# Everything can be overridden from the environment:
+#   WEB_CONCURRENCY     worker processes (default: 2 x CPUs + 1)
+#   WORKER_CLASS        gevent (default), sync or gthread
+#   WORKER_CONNECTIONS  concurrent requests per gevent worker
+#   GUNICORN_THREADS    threads per worker (sync/gthread; >1 means gthread)
+#   PRELOAD_APP         import the app once in the master (default: true)
+# ------------------------------------------------------------------
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+worker_class = os.getenv("WORKER_CLASS", "gevent")
+worker_connections = int(os.getenv("WORKER_CONNECTIONS", 500))
+threads = int(os.getenv("GUNICORN_THREADS", 1))
+
+# Blueprints and their libraries (supabase, cloudinary, ...) are imported
+# once and shared copy-on-write; Supabase/Cohere clients and the background
+# pools are still created lazily inside each worker (see utils/*_utils.py)
+preload_app = os.getenv("PRELOAD_APP", "true").lower() == "true"
+
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 30))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", 30))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", 5))
+
+# Recycle workers now and then to bound memory growth of in-process caches
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", 5000))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", 500))
+
+accesslog = os.getenv("GUNICORN_ACCESS_LOG")
+loglevel = os.getenv("GUNICORN_LOG_LEVEL", "info")
+
+# With preload_app the app (and ssl/socket/threading) is imported in the
+# master, before the gevent worker would patch them; patch up front instead
+if worker_class == "gevent" and preload_app:
+    from gevent import monkey
+    monkey.patch_all()
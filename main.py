@@ -8,13 +8,15 @@ from routes.upvote import upvote_bp
 from routes.comment import comment_bp
 from routes.admin import admin_bp
 from routes.summary import summary_bp
+from routes.upload import upload_bp
 
 app = Flask(__name__)
 app.config.from_object(Config)
 CORS(app,
      origins=["https://samaj-issue-frontend.vercel.app","http://localhost:5173"],
      supports_credentials=True,
-     allow_headers=["Content-Type", "Authorization"],
+     allow_headers=["Content-Type", "Authorization", "If-None-Match"],
+     expose_headers=["X-Next-Cursor", "ETag"],
      methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"])
 
 
@@ -28,6 +30,7 @@ app.register_blueprint(upvote_bp, url_prefix="/api") # tested complete
 app.register_blueprint(comment_bp, url_prefix="/api") # tested complete
 app.register_blueprint(admin_bp, url_prefix="/api") # tested complete
 app.register_blueprint(summary_bp, url_prefix="/api") # tested complete
+app.register_blueprint(upload_bp, url_prefix="/api")
 
 @app.route("/api/ping")
 def ping():
@@ -1,27 +1,42 @@
+import os
+import socket
 from flask import Blueprint, jsonify, request
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from supabase import create_client
 from config import Config
+from utils.supabase_utils import supabase
+from utils.auth_utils import authorize
+from utils.ai_utils import invalidate_summary
+from utils.email_utils import email_queue
+from utils.geo_utils import issue_geo
+from utils.stats_utils import admin_stats, invalidate_admin_stats
+from utils.pagination_utils import iter_pages
+from utils.http_utils import stream_pages, wants_stream
 
 admin_bp = Blueprint("admin", __name__)
-supabase = create_client(Config.SUPABASE_URL, Config.SUPABASE_KEY)
 
-# -------------------------------
-# 🔐 Admin check helper
-# -------------------------------
-def is_admin(user_id):
-    user = supabase.table("user").select("role").eq("id", user_id).single().execute()
-    return user.data and user.data["role"] == "admin"
+
+def parse_ids(values, field):
+    # De-duplicated list of integer ids from a JSON body field
+    if not isinstance(values, list) or not values:
+        raise ValueError(f"{field} must be a non-empty list")
+    if len(values) > Config.BULK_MAX_IDS:
+        raise ValueError(f"At most {Config.BULK_MAX_IDS} {field} per request")
+    try:
+        return list(dict.fromkeys(int(v) for v in values))
+    except (TypeError, ValueError):
+        raise ValueError(f"{field} must be integers")
+
 
 # -------------------------------
 # GET /admin/flagged-comments
 # -------------------------------
 @admin_bp.route("/admin/flagged-comments", methods=["GET"])
-@jwt_required()
+@authorize()
 def get_flagged_comments():
-    user_id = get_jwt_identity()
-    if not is_admin(user_id):
-        return jsonify({"error": "Unauthorized"}), 403
+    # stream=true / format=ndjson: write rows page by page instead of all at once
+    if wants_stream():
+        def make_query():
+            return supabase.table("comment").select("*").eq("is_flagged", True)
+        return stream_pages(iter_pages(make_query, Config.MAX_PAGE_SIZE)), 200
 
     res = supabase.table("comment").select("*").eq("is_flagged", True).order("created_at", desc=True).execute()
     return jsonify(res.data), 200
@@ -30,41 +45,152 @@ def get_flagged_comments():
 # GET /admin/stats
 # -------------------------------
 @admin_bp.route("/admin/stats", methods=["GET"])
-@jwt_required()
+@authorize()
 def get_stats():
-    user_id = get_jwt_identity()
-    if not is_admin(user_id):
-        return jsonify({"error": "Unauthorized"}), 403
-
     try:
-        pending = supabase.table("issue").select("id", count="exact").eq("status", "Pending").execute()
-        in_progress = supabase.table("issue").select("id", count="exact").eq("status", "In Progress").execute()
-        resolved = supabase.table("issue").select("id", count="exact").eq("status", "Resolved").execute()
+        stats = admin_stats(supabase)
+        by_status = stats.get("by_status") or {}
 
         return jsonify({
-            "Pending": pending.count or 0,
-            "In Progress": in_progress.count or 0,
-            "Resolved": resolved.count or 0
+            "Pending": by_status.get("Pending", 0),
+            "In Progress": by_status.get("In Progress", 0),
+            "Resolved": by_status.get("Resolved", 0),
+            "issues_per_day": stats.get("issues_per_day", []),
+            "top_reporters": stats.get("top_reporters", []),
+            "flagged_comments": stats.get("flagged_comments", 0)
         }), 200
     except Exception as e:
         return jsonify({"error": "Failed to fetch stats", "details": str(e)}), 500
 
 
+# -------------------------------
+# GET /admin/email-queue
+# Each worker process has its own queue, so the counters are for the
+# worker that answered, identified by "worker" (host:pid); they are not
+# totals for the deployment.
+# -------------------------------
+@admin_bp.route("/admin/email-queue", methods=["GET"])
+@authorize()
+def get_email_queue_stats():
+    worker = f"{socket.gethostname()}:{os.getpid()}"
+    return jsonify({**email_queue.stats, "pending": email_queue.pending(), "worker": worker}), 200
+
+
 # -------------------------------
 # PUT /admin/issues/<id>/status
 # -------------------------------
 @admin_bp.route("/admin/issues/<int:issue_id>/status", methods=["PUT"])
-@jwt_required()
+@authorize()
 def update_issue_status(issue_id):
-    user_id = get_jwt_identity()
-    if not is_admin(user_id):
-        return jsonify({"error": "Unauthorized"}), 403
-
     data = request.json
     new_status = data.get("status")
 
     if new_status not in ["Pending", "In Progress", "Resolved"]:
         return jsonify({"error": "Invalid status"}), 400
 
-    supabase.table("issue").update({"status": new_status}).eq("id", issue_id).execute()
+    res = supabase.table("issue").update({"status": new_status}).eq("id", issue_id).execute()
+    issue_geo.upsert(res.data or [])
+    invalidate_admin_stats()
     return jsonify({"message": f"Issue status updated to {new_status}"}), 200
+
+
+# -------------------------------
+# PUT /admin/issues/status
+# Body: {"issue_ids": [...], "status": "..."}; one update for the batch
+# -------------------------------
+@admin_bp.route("/admin/issues/status", methods=["PUT"])
+@authorize()
+def bulk_update_issue_status():
+    data = request.json or {}
+    new_status = data.get("status")
+
+    if new_status not in ["Pending", "In Progress", "Resolved"]:
+        return jsonify({"error": "Invalid status"}), 400
+    try:
+        issue_ids = parse_ids(data.get("issue_ids"), "issue_ids")
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        res = supabase.table("issue").update({"status": new_status}).in_("id", issue_ids).execute()
+    except Exception as e:
+        return jsonify({"error": "Failed to update issues", "details": str(e)}), 500
+
+    issue_geo.upsert(res.data or [])
+    invalidate_admin_stats()
+    updated = {row["id"] for row in res.data or []}
+    return jsonify({
+        "status": new_status,
+        "updated": [i for i in issue_ids if i in updated],
+        "not_found": [i for i in issue_ids if i not in updated]
+    }), 200
+
+
+# -------------------------------
+# POST /admin/comments/bulk
+# Body: {"comment_ids": [...], "action": "flag" | "unflag" | "delete"}
+# -------------------------------
+@admin_bp.route("/admin/comments/bulk", methods=["POST"])
+@authorize()
+def bulk_moderate_comments():
+    data = request.json or {}
+    action = data.get("action")
+
+    if action not in ["flag", "unflag", "delete"]:
+        return jsonify({"error": "Invalid action"}), 400
+    try:
+        comment_ids = parse_ids(data.get("comment_ids"), "comment_ids")
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        if action == "delete":
+            res = supabase.table("comment").delete().in_("id", comment_ids).execute()
+        else:
+            res = supabase.table("comment").update({"is_flagged": action == "flag"}).in_("id", comment_ids).execute()
+    except Exception as e:
+        return jsonify({"error": "Failed to update comments", "details": str(e)}), 500
+
+    rows = res.data or []
+    if action == "delete":
+        for issue_id in {row["issue_id"] for row in rows}:
+            invalidate_summary(issue_id, rebase=True)
+    invalidate_admin_stats()
+
+    done = {row["id"] for row in rows}
+    return jsonify({
+        "action": action,
+        "updated": [i for i in comment_ids if i in done],
+        "not_found": [i for i in comment_ids if i not in done]
+    }), 200
+
+
+# -------------------------------
+# POST /admin/issues/purge
+# Body: {"issue_ids": [...]}; each issue is deleted with its upvotes,
+# comments and summary, all in one transaction
+# -------------------------------
+@admin_bp.route("/admin/issues/purge", methods=["POST"])
+@authorize()
+def purge_issues():
+    data = request.json or {}
+    try:
+        issue_ids = parse_ids(data.get("issue_ids"), "issue_ids")
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        res = supabase.rpc("delete_issues", {"p_issue_ids": issue_ids}).execute()
+    except Exception as e:
+        return jsonify({"error": "Failed to purge issues", "details": str(e)}), 500
+
+    deleted = {row["id"] for row in res.data or []}
+    issue_geo.remove(deleted)
+    for issue_id in deleted:
+        invalidate_summary(issue_id)
+    invalidate_admin_stats()
+
+    return jsonify({
+        "deleted": [i for i in issue_ids if i in deleted],
+        "not_found": [i for i in issue_ids if i not in deleted]
+    }), 200
@@ -1,17 +1,27 @@
-import cloudinary.uploader
 from flask import Blueprint, request, jsonify
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
 from utils.email_utils import send_email
-from utils.otp_utils import generate_otp
+from utils.otp_utils import generate_otp, otp_matches
+from utils.auth_utils import role_claims
+from utils.http_utils import conditional_response, make_etag
+from utils.upload_utils import upload_in_background, upload_owner, verified_image_url
+from utils.concurrency_utils import run_parallel
+from utils.profile_utils import get_profile, get_profiles, invalidate_profile
 from datetime import datetime, timedelta
+from utils.supabase_utils import supabase
 from config import Config
-import cloudinary
-from supabase import create_client
 
 auth_bp = Blueprint("auth", __name__)
 
-supabase = create_client(Config.SUPABASE_URL, Config.SUPABASE_KEY)
+
+def set_user_picture(column, value):
+    def save(picture_url):
+        res = supabase.table("user").update({"picture_url": picture_url}).eq(column, value).execute()
+        for user in res.data or []:
+            invalidate_profile(user["id"])
+    return save
+
 
 # -------------------------------
 # STEP 1: Request Signup (send OTP)
@@ -31,24 +41,23 @@ def signup():
     code = generate_otp()
     expires_at = (datetime.utcnow() + timedelta(minutes=5)).isoformat()
 
-    # ✅ 3. Send OTP via email
-    if not send_email(to=email, otp_code=code):
-        return jsonify({"error": "Failed to send OTP"}), 500
-
-    # ✅ 4. Store OTP in Supabase
+    # ✅ 3. Store OTP in Supabase
     try:
-        otp_response = supabase.table("otp").insert({
+        supabase.table("otp").insert({
             "email": email,
             "code": code,
-            "expires_at": (datetime.utcnow() + timedelta(minutes=5)).isoformat()
+            "expires_at": expires_at
         }).execute()
 
-        return jsonify({"message": "OTP sent to your email"}), 200
-
     except Exception as e:
         print("❌ Error inserting OTP into Supabase:", e)
         return jsonify({"error": "Internal server error while saving OTP"}), 500
 
+    # ✅ 4. Queue OTP email (delivered in the background)
+    send_email(to=email, otp_code=code)
+
+    return jsonify({"message": "OTP sent to your email"}), 200
+
 
 @auth_bp.route("/verify-otp", methods=["POST"])
 def verify_otp():
@@ -60,44 +69,40 @@ def verify_otp():
     picture_file = request.files.get("picture")
 
     try:
+        # 1-2. OTP lookup and existing-user check are independent, so they
+        # run in parallel; results are checked in order
+        otp_response, user_check = run_parallel(
+            lambda: supabase.table("otp").select("*").eq("email", email).order("expires_at", desc=True).limit(1).execute(),
+            lambda: supabase.table("user").select("id").eq("email", email).execute()
+        )
+
         # 1. Get latest OTP
-        response = supabase.table("otp").select("*").eq("email", email).order("expires_at", desc=True).limit(1).execute()
-        otp = response.data
+        otp = otp_response.data
 
         if not otp:
             return jsonify({"error": "OTP not found"}), 400
 
-        otp_record = otp[0]
-
-        # ✅ FIX: Parse the date using strptime (microseconds included)
-        try:
-            expires_at = datetime.strptime(otp_record['expires_at'], "%Y-%m-%dT%H:%M:%S.%f")
-        except ValueError:
-            # fallback in case microseconds are missing
-            expires_at = datetime.strptime(otp_record['expires_at'], "%Y-%m-%dT%H:%M:%S")
-
-        if otp_record['code'] != code or expires_at < datetime.utcnow():
+        if not otp_matches(otp[0], code):
             return jsonify({"error": "Invalid or expired OTP"}), 400
 
         # 2. Check if user already exists
-        user_check = supabase.table("user").select("*").eq("email", email).execute()
         if user_check.data:
             return jsonify({"error": "User already verified"}), 400
 
-        # 3. Hash password
+        # 3. Hash the password only once the OTP and email have checked out
+        if not password:
+            return jsonify({"error": "Password is required"}), 400
         hashed_password = generate_password_hash(password)
 
-        # 4. Upload profile picture to Cloudinary
-        picture_url = ""
-        if picture_file:
-            try:
-                result = cloudinary.uploader.upload(picture_file)
-                picture_url = result.get("secure_url", "")
-            except Exception as e:
-                print("Cloudinary error:", e)
+        # 4. Profile picture uploaded directly to Cloudinary (see POST /uploads/sign),
+        #    signed for this email
+        try:
+            picture_url = verified_image_url(data, "picture", "profile", upload_owner(email=email)) or ""
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
 
         # 5. Insert user
-        supabase.table("user").insert({
+        inserted = supabase.table("user").insert({
             "name": name,
             "email": email,
             "password": hashed_password,
@@ -105,9 +110,16 @@ def verify_otp():
             "picture_url": picture_url
         }).execute()
 
+        for user in inserted.data or []:
+            invalidate_profile(user["id"])
+
         # 6. Delete used OTPs
         supabase.table("otp").delete().eq("email", email).execute()
 
+        # 7. Legacy multipart picture: uploaded in the background
+        if picture_file and not picture_url:
+            upload_in_background(picture_file, "profile", set_user_picture("email", email))
+
         return jsonify({"message": "Signup complete. You can now login."}), 201
 
     except Exception as e:
@@ -135,7 +147,7 @@ def login():
     if not check_password_hash(user.get("password", ""), password):
         return jsonify({"error": "Invalid password"}), 401
 
-    access_token = create_access_token(identity=str(user["id"]))
+    access_token = create_access_token(identity=str(user["id"]), additional_claims=role_claims(user))
     return jsonify({
         "token": access_token,
         "user": {
@@ -154,8 +166,10 @@ def login():
 @jwt_required()
 def get_me():
     user_id = get_jwt_identity()
-    response = supabase.table("user").select("*").eq("id", user_id).execute()
-    user = response.data[0] if response.data else None
+    try:
+        user = get_profile(user_id)
+    except Exception as e:
+        return jsonify({"error": "Failed to fetch user", "details": str(e)}), 500
 
     if user:
         return jsonify({
@@ -172,16 +186,43 @@ def get_me():
 @auth_bp.route("/user/<int:user_id>", methods=["GET"])
 def get_user_by_id(user_id):
     try:
-        response = supabase.table("user").select("id, name, email, role, picture_url").eq("id", user_id).single().execute()
-        
-        if response.data:
-            return jsonify(response.data), 200
+        profile = get_profile(user_id)
+
+        if profile:
+            user = {k: v for k, v in profile.items() if k != "updated_at"}
+            return conditional_response(make_etag("user", user_id, profile["updated_at"]), lambda: (jsonify(user), 200))
         else:
             return jsonify({"error": "User not found"}), 404
 
     except Exception as e:
         return jsonify({"error": "Failed to fetch user", "details": str(e)}), 500
 
+# get users by ids: GET /users?ids=1,2,3
+@auth_bp.route("/users", methods=["GET"])
+def get_users_by_ids():
+    try:
+        user_ids = list(dict.fromkeys(int(v) for v in request.args.get("ids", "").split(",") if v.strip()))
+    except ValueError:
+        return jsonify({"error": "ids must be comma-separated integers"}), 400
+
+    if not user_ids:
+        return jsonify({"error": "ids is required"}), 400
+    if len(user_ids) > Config.MAX_PAGE_SIZE:
+        return jsonify({"error": f"At most {Config.MAX_PAGE_SIZE} ids per request"}), 400
+
+    try:
+        profiles = get_profiles(user_ids)
+    except Exception as e:
+        return jsonify({"error": "Failed to fetch users", "details": str(e)}), 500
+
+    users = {str(i): {k: v for k, v in profiles[i].items() if k != "updated_at"} for i in user_ids if i in profiles}
+    versions = [profiles[i]["updated_at"] for i in user_ids if i in profiles]
+
+    def build():
+        return jsonify({"users": users, "not_found": [i for i in user_ids if i not in profiles]}), 200
+
+    return conditional_response(make_etag("users", user_ids, versions), build)
+
 # update profile route
 
 @auth_bp.route("/update-profile", methods=["PUT"])
@@ -203,19 +244,29 @@ def update_profile():
     if password:
         update_data["password"] = generate_password_hash(password)
 
-    # 🖼️ Update profile picture
-    if picture_file:
-        try:
-            result = cloudinary.uploader.upload(picture_file)
-            update_data["picture_url"] = result.get("secure_url", "")
-        except Exception as e:
-            return jsonify({"error": "Image upload failed", "details": str(e)}), 500
+    # 🖼️ Update profile picture (direct upload, or multipart in the background)
+    try:
+        picture_url = verified_image_url(data, "picture", "profile", upload_owner(user_id))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except RuntimeError as e:
+        return jsonify({"error": "Upload verification failed", "details": str(e)}), 500
 
-    if not update_data:
+    if picture_url:
+        update_data["picture_url"] = picture_url
+
+    picture_pending = bool(picture_file and not picture_url)
+    if not update_data and not picture_pending:
         return jsonify({"error": "No data provided to update"}), 400
 
     try:
-        supabase.table("user").update(update_data).eq("id", user_id).execute()
-        return jsonify({"message": "Profile updated successfully"}), 200
+        if update_data:
+            supabase.table("user").update(update_data).eq("id", user_id).execute()
+            invalidate_profile(user_id)
     except Exception as e:
         return jsonify({"error": "Profile update failed", "details": str(e)}), 500
+
+    if picture_pending:
+        upload_in_background(picture_file, "profile", set_user_picture("id", user_id))
+
+    return jsonify({"message": "Profile updated successfully", "picture_pending": picture_pending}), 200
@@ -1,22 +1,87 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, g
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from supabase import create_client
-from config import Config
+from utils.supabase_utils import supabase
+from utils.auth_utils import authorize
+from utils.ai_utils import invalidate_summary
+from utils.stats_utils import invalidate_admin_stats
+from utils.http_utils import conditional_response, make_etag, table_versions
+from utils.pagination_utils import decode_cursor, paginate, parse_limit
 
 comment_bp = Blueprint("comment", __name__)
-supabase = create_client(Config.SUPABASE_URL, Config.SUPABASE_KEY)
+
+COMMENT_FIELDS = "id, text, created_at, user_id, parent_id, reply_count, user(id, name, picture_url)"
+
+
+def load_comment(comment_id):
+    res = supabase.table("comment").select("id, user_id, issue_id").eq("id", comment_id).limit(1).execute()
+    return res.data[0] if res.data else None
+
+
+def split_authors(comments):
+    # Move the embedded author of each comment into one {user_id: user} map
+    users = {}
+    for comment in comments:
+        user = comment.pop("user", None)
+        if user:
+            users[str(user["id"])] = user
+    return users
+
+
+def comment_page(make_query, *etag_parts):
+    # {"comments": [...], "users": {...}} for one page; the cursor for the
+    # next page is returned in the X-Next-Cursor header
+    cursor = request.args.get("cursor")
+    try:
+        limit = parse_limit(request.args.get("limit"))
+        if cursor:
+            decode_cursor(cursor)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    # Comments embed author names/pictures, so both tables version the ETag
+    try:
+        versions = table_versions(supabase, "comment", "user")
+    except Exception as e:
+        return jsonify({"error": "Failed to fetch comments", "details": str(e)}), 500
+
+    def build():
+        try:
+            comments, next_cursor = paginate(make_query(), limit, cursor)
+        except Exception as e:
+            return jsonify({"error": "Failed to fetch comments", "details": str(e)}), 500
+
+        users = split_authors(comments)
+        response = jsonify({"comments": comments, "users": users})
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        return response, 200
+
+    etag = make_etag(*etag_parts, versions, limit, cursor)
+    return conditional_response(etag, build)
+
 
 # ------------------------------
-# GET: All Comments for an Issue
+# GET: Top-level Comments for an Issue (newest first, paginated)
+# Query params: limit, cursor
+# Replies are loaded separately; reply_count tells whether a comment has any
 # ------------------------------
 @comment_bp.route("/issues/<int:issue_id>/comments", methods=["GET"])
 def get_comments(issue_id):
-    try:
-        res = supabase.table("comment").select("id, text, created_at, user_id, user(id, name, picture_url)").eq("issue_id", issue_id).order("created_at", desc=True).execute()
+    def make_query():
+        return supabase.table("comment").select(COMMENT_FIELDS).eq("issue_id", issue_id).is_("parent_id", "null")
 
-        return jsonify(res.data), 200
-    except Exception as e:
-        return jsonify({"error": "Failed to fetch comments", "details": str(e)}), 500
+    return comment_page(make_query, "comments", issue_id)
+
+
+# ------------------------------
+# GET: Replies to a Comment (newest first, paginated)
+# ------------------------------
+@comment_bp.route("/comments/<int:comment_id>/replies", methods=["GET"])
+def get_replies(comment_id):
+    def make_query():
+        return supabase.table("comment").select(COMMENT_FIELDS).eq("parent_id", comment_id)
+
+    return comment_page(make_query, "replies", comment_id)
 
 
 # ------------------------------
@@ -28,17 +93,32 @@ def add_comment(issue_id):
     user_id = get_jwt_identity()
     data = request.json
     text = data.get("text")
+    parent_id = data.get("parent_id")
 
     if not text:
         return jsonify({"error": "Comment text is required"}), 400
 
+    try:
+        # Replies must point at a comment on the same issue
+        if parent_id is not None:
+            parent_id = int(parent_id)
+            parent = load_comment(parent_id)
+            if not parent or parent["issue_id"] != issue_id:
+                return jsonify({"error": "Parent comment not found"}), 400
+    except (TypeError, ValueError):
+        return jsonify({"error": "parent_id must be an integer"}), 400
+    except Exception as e:
+        return jsonify({"error": "Failed to add comment", "details": str(e)}), 500
+
     try:
         supabase.table("comment").insert({
             "text": text,
             "user_id": user_id,
             "issue_id": issue_id,
+            "parent_id": parent_id,
             "is_flagged": False  # Default is not flagged
         }).execute()
+        invalidate_summary(issue_id)
         return jsonify({"message": "Comment added", "flagged": False}), 201
     except Exception as e:
         return jsonify({"error": "Failed to add comment", "details": str(e)}), 500
@@ -48,9 +128,8 @@ def add_comment(issue_id):
 # PUT: Update Comment (Owner or Admin)
 # ------------------------------
 @comment_bp.route("/comments/<int:comment_id>", methods=["PUT"])
-@jwt_required()
+@authorize(loader=load_comment, not_found="Comment not found")
 def update_comment(comment_id):
-    user_id = get_jwt_identity()
     data = request.json
     new_text = data.get("text", "").strip()
 
@@ -58,22 +137,9 @@ def update_comment(comment_id):
         return jsonify({"error": "Comment text is required"}), 400
 
     try:
-        # Fetch comment to check ownership
-        comment_res = supabase.table("comment").select("id", "user_id").eq("id", comment_id).single().execute()
-        if not comment_res.data:
-            return jsonify({"error": "Comment not found"}), 404
-
-        comment = comment_res.data
-
-        # Fetch user to check role
-        user_res = supabase.table("user").select("role").eq("id", user_id).single().execute()
-        role = user_res.data["role"] if user_res.data else "user"
-
-        if str(comment["user_id"]) != str(user_id) and role != "admin":
-            return jsonify({"error": "Unauthorized"}), 403
-
         # Perform update
         supabase.table("comment").update({"text": new_text}).eq("id", comment_id).execute()
+        invalidate_summary(g.resource["issue_id"], rebase=True)
         return jsonify({"message": "Comment updated"}), 200
 
     except Exception as e:
@@ -84,22 +150,11 @@ def update_comment(comment_id):
 # DELETE: Comment (Owner or Admin)
 # ------------------------------
 @comment_bp.route("/comments/<int:comment_id>", methods=["DELETE"])
-@jwt_required()
+@authorize(loader=load_comment, not_found="Comment not found")
 def delete_comment(comment_id):
-    user_id = get_jwt_identity()
-
     try:
-        comment = supabase.table("comment").select("id", "user_id").eq("id", comment_id).single().execute()
-        if not comment.data:
-            return jsonify({"error": "Comment not found"}), 404
-
-        user = supabase.table("user").select("role").eq("id", user_id).single().execute()
-        is_admin = user.data["role"] == "admin"
-
-        if str(comment.data["user_id"]) != str(user_id) and not is_admin:
-            return jsonify({"error": "Unauthorized"}), 403
-
         supabase.table("comment").delete().eq("id", comment_id).execute()
+        invalidate_summary(g.resource["issue_id"], rebase=True)
         return jsonify({"message": "Comment deleted"}), 200
 
     except Exception as e:
@@ -110,19 +165,14 @@ def delete_comment(comment_id):
 # PUT: Flag Comment (Admin Only)
 # ------------------------------
 @comment_bp.route("/comments/<int:comment_id>/flag", methods=["PUT"])
-@jwt_required()
+@authorize(message="Only admin can flag comments")
 def flag_comment(comment_id):
-    user_id = get_jwt_identity()
-
     try:
-        user = supabase.table("user").select("role").eq("id", user_id).single().execute()
-        if not user.data or user.data["role"] != "admin":
-            return jsonify({"error": "Only admin can flag comments"}), 403
-
         response = supabase.table("comment").update({"is_flagged": True}).eq("id", comment_id).execute()
         print(response.data)
         if not response.data:
             return jsonify({"error": "Comment not found"}), 403
+        invalidate_admin_stats()
         
         return jsonify({"message": "Comment flagged"}), 200
 
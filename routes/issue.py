@@ -1,31 +1,207 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, g
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from supabase import create_client
+from utils.supabase_utils import supabase
 from config import Config
-import cloudinary
+from utils.pagination_utils import decode_cursor, encode_cursor, iter_pages, parse_limit, paginate
+from utils.stats_utils import attach_issue_stats
+from utils.auth_utils import authorize
+from utils.ai_utils import invalidate_summary
+from utils.upload_utils import upload_in_background, upload_owner, verified_image_url
+from utils.http_utils import conditional_response, make_etag, stream_pages, table_versions, wants_ndjson, wants_stream
+from utils.search_utils import create_issue_search
+from utils.geo_utils import issue_geo, parse_bbox, parse_coordinates, parse_radius
 
 issue_bp = Blueprint("issue", __name__)
+issue_search = create_issue_search(supabase)
 
-supabase = create_client(Config.SUPABASE_URL, Config.SUPABASE_KEY)
 
-# --------------------------------------
-# GET /issues – Public list of all issues
-# --------------------------------------
+def load_issue(issue_id):
+    res = supabase.table("issue").select("*").eq("id", issue_id).limit(1).execute()
+    return res.data[0] if res.data else None
+
+
+def set_issue_image(issue_id):
+    def save(image_url):
+        res = supabase.table("issue").update({"image_url": image_url}).eq("id", issue_id).execute()
+        issue_geo.upsert(res.data or [])
+    return save
+
+
+# --------------------------------------------------------------
+# GET /issues – Public list of issues (newest first, paginated)
+# Query params: limit, cursor, sort, status, created_by, location, expand, stream, format
+# The cursor for the next page is returned in the X-Next-Cursor header
+# sort=hot ranks by the precomputed hot_score (upvotes, comments, recency)
+# expand=stats adds total_upvotes, has_upvoted and comment_count per issue
+# stream=true (JSON array) or format=ndjson streams all matching issues
+# --------------------------------------------------------------
 @issue_bp.route("/issues", methods=["GET"])
+@jwt_required(optional=True)
 def get_issues():
-    response = supabase.table("issue").select("*").order("created_at", desc=True).execute()
-    return jsonify(response.data), 200
+    streaming = wants_stream()
+    cursor = request.args.get("cursor")
+
+    status = request.args.get("status")
+    created_by = request.args.get("created_by")
+    location = request.args.get("location")
+    sort = request.args.get("sort", "new")
+
+    if status and status not in ["Pending", "In Progress", "Resolved"]:
+        return jsonify({"error": "Invalid status"}), 400
+    if sort not in ["new", "hot"]:
+        return jsonify({"error": "Invalid sort"}), 400
+    sort_key = "hot_score" if sort == "hot" else "created_at"
+
+    try:
+        # Streams send every matching issue, fetched MAX_PAGE_SIZE rows at a time
+        limit = parse_limit(request.args.get("limit"), Config.MAX_PAGE_SIZE if streaming else None)
+        if cursor:
+            decode_cursor(cursor, sort_key)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    def make_query():
+        query = supabase.table("issue").select("*")
+        if status:
+            query = query.eq("status", status)
+        if created_by:
+            query = query.eq("created_by", created_by)
+        if location:
+            query = query.ilike("location", f"%{location}%")
+        return query
+
+    expand_stats = "stats" in request.args.get("expand", "").split(",")
+    user_id = get_jwt_identity() if expand_stats else None
+
+    # ETag from table versions: one small query decides whether to send a 304
+    try:
+        versions = table_versions(supabase, "issue", "comment") if expand_stats else table_versions(supabase, "issue")
+    except Exception as e:
+        return jsonify({"error": "Failed to fetch issues", "details": str(e)}), 500
+    etag = make_etag("issues", versions, sorted(request.args.items(multi=True)), user_id, wants_ndjson())
+
+    def stream():
+        for issues in iter_pages(make_query, limit, cursor, sort_key):
+            if expand_stats:
+                attach_issue_stats(supabase, issues, user_id)
+            yield issues
+
+    def build():
+        if streaming:
+            return stream_pages(stream()), 200
+
+        try:
+            issues, next_cursor = paginate(make_query(), limit, cursor, sort_key)
+            if expand_stats:
+                attach_issue_stats(supabase, issues, user_id)
+        except Exception as e:
+            return jsonify({"error": "Failed to fetch issues", "details": str(e)}), 500
+
+        response = jsonify(issues)
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        return response, 200
+
+    return conditional_response(etag, build, private=bool(user_id))
+
+# --------------------------------------------------------------
+# GET /issues/search – Ranked full-text search over issues
+# Query params: q (required), status, limit, cursor
+# Best matches first; each issue carries its "rank". The cursor for
+# the next page is returned in the X-Next-Cursor header
+# --------------------------------------------------------------
+@issue_bp.route("/issues/search", methods=["GET"])
+def search_issues():
+    query = request.args.get("q", "").strip()
+    status = request.args.get("status")
+    cursor = request.args.get("cursor")
+
+    if not query:
+        return jsonify({"error": "Search query is required"}), 400
+    if status and status not in ["Pending", "In Progress", "Resolved"]:
+        return jsonify({"error": "Invalid status"}), 400
+
+    try:
+        limit = parse_limit(request.args.get("limit"))
+        after = decode_cursor(cursor, "rank") if cursor else None
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        # One extra row tells whether another page exists
+        issues = issue_search.search(query, status, limit + 1, after)
+    except Exception as e:
+        return jsonify({"error": "Search failed", "details": str(e)}), 500
+
+    response = jsonify(issues[:limit])
+    if len(issues) > limit:
+        response.headers["X-Next-Cursor"] = encode_cursor(issues[limit - 1], "rank")
+    return response, 200
+
+
+# --------------------------------------------------------------
+# GET /issues/nearby – Issues with coordinates, nearest first
+# Query params: lat + lng with radius (metres), and/or bbox
+# (min_lng,min_lat,max_lng,max_lat; distances then default to its
+# centre), status, limit, cursor. Each issue carries "distance_m";
+# the cursor for the next page is returned in the X-Next-Cursor header
+# --------------------------------------------------------------
+@issue_bp.route("/issues/nearby", methods=["GET"])
+def get_nearby_issues():
+    status = request.args.get("status")
+    cursor = request.args.get("cursor")
+
+    if status and status not in ["Pending", "In Progress", "Resolved"]:
+        return jsonify({"error": "Invalid status"}), 400
+
+    try:
+        lat, lng = parse_coordinates({"latitude": request.args.get("lat"), "longitude": request.args.get("lng")})
+        bbox = parse_bbox(request.args["bbox"]) if request.args.get("bbox") else None
+        radius = parse_radius(request.args.get("radius"))
+        limit = parse_limit(request.args.get("limit"))
+        after = decode_cursor(cursor, "distance_m") if cursor else None
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    if bbox is None and lat is None:
+        return jsonify({"error": "lat and lng, or bbox, are required"}), 400
+    if lat is None:
+        lat, lng = (bbox[0] + bbox[2]) / 2, (bbox[1] + bbox[3]) / 2
+    if bbox is None and radius is None:
+        radius = Config.NEARBY_DEFAULT_RADIUS
+
+    try:
+        # One extra row tells whether another page exists
+        issues = issue_geo.nearby(lat, lng, radius, bbox, status, limit + 1, after)
+    except Exception as e:
+        return jsonify({"error": "Failed to fetch nearby issues", "details": str(e)}), 500
+
+    response = jsonify(issues[:limit])
+    if len(issues) > limit:
+        response.headers["X-Next-Cursor"] = encode_cursor(issues[limit - 1], "distance_m")
+    return response, 200
+
 
 # ---------------------------------------------------
 # GET /issues/<id> – Get full issue detail by ID
 # ---------------------------------------------------
 @issue_bp.route("/issues/<int:issue_id>", methods=["GET"])
 def get_issue(issue_id):
-    response = supabase.table("issue").select("*").eq("id", issue_id).execute()
-    data = response.data
-    if not data:
+    # Revalidation: check the row version first and only fetch the row if it
+    # changed. Without If-None-Match the row is fetched once and its
+    # updated_at makes the ETag.
+    if request.if_none_match:
+        version = supabase.table("issue").select("updated_at").eq("id", issue_id).execute()
+        if not version.data:
+            return jsonify({"error": "Issue not found"}), 404
+        etag = make_etag("issue", issue_id, version.data[0]["updated_at"])
+        if request.if_none_match.contains_weak(etag):
+            return conditional_response(etag, None)
+
+    issue = load_issue(issue_id)
+    if not issue:
         return jsonify({"error": "Issue not found"}), 404
-    return jsonify(data[0]), 200
+    return conditional_response(make_etag("issue", issue_id, issue["updated_at"]), lambda: (jsonify(issue), 200))
 
 
 # ---------------------------------------------------
@@ -44,29 +220,38 @@ def create_issue():
     location = request.form.get("location")
     image_file = request.files.get("image")
 
-    image_url = ""
-
-    if image_file:
-        try:
-            upload_result = cloudinary.uploader.upload(image_file)
-            image_url = upload_result.get("secure_url", "")
-        except Exception as e:
-            return jsonify({"error": "Image upload failed", "details": str(e)}), 500
+    # Image uploaded directly to Cloudinary (see POST /uploads/sign)
+    try:
+        image_url = verified_image_url(request.form, "image", "issue", upload_owner(user_id)) or ""
+        latitude, longitude = parse_coordinates(request.form)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except RuntimeError as e:
+        return jsonify({"error": "Upload verification failed", "details": str(e)}), 500
 
     # Prepare data for Supabase insert
     issue_data = {
         "title": title,
         "description": description,
         "location": location,
+        "latitude": latitude,
+        "longitude": longitude,
         "image_url": image_url,
         "created_by": user_id
     }
 
     try:
         response = supabase.table("issue").insert(issue_data).execute()
-        return jsonify({"message": "Issue posted successfully", "data": response.data}), 201
     except Exception as e:
         return jsonify({"error": "Database insert failed", "details": str(e)}), 500
+    issue_geo.upsert(response.data or [])
+
+    # Legacy multipart image: uploaded in the background, row patched when done
+    image_pending = bool(image_file and not image_url and response.data)
+    if image_pending:
+        upload_in_background(image_file, "issue", set_issue_image(response.data[0]["id"]))
+
+    return jsonify({"message": "Issue posted successfully", "data": response.data, "image_pending": image_pending}), 201
 
 
 # ---------------------------------------------------------
@@ -74,34 +259,10 @@ def create_issue():
 # ---------------------------------------------------------
 
 @issue_bp.route("/issues/<int:issue_id>", methods=["PUT"])
-@jwt_required()
+@authorize(loader=load_issue, owner_field="created_by", not_found="Issue not found")
 def update_issue(issue_id):
-    user_id = get_jwt_identity()
-
-    # ✅ Step 1: Get the issue safely
-    try:
-        issue_response = supabase.table("issue").select("*").eq("id", issue_id).execute()
-        issue_data = issue_response.data
-        if not issue_data:
-            return jsonify({"error": "Issue not found"}), 404
-        issue = issue_data[0]
-    except Exception as e:
-        return jsonify({"error": "Database error fetching issue", "details": str(e)}), 500
-
-    # ✅ Step 2: Get the user and check role
-    try:
-        user_response = supabase.table("user").select("role").eq("id", user_id).execute()
-        user_data = user_response.data
-        if not user_data:
-            return jsonify({"error": "User not found"}), 403
-        user = user_data[0]
-    except Exception as e:
-        return jsonify({"error": "User fetch failed", "details": str(e)}), 500
-
-    # ✅ Step 3: Check permission
-    if str(issue["created_by"]) != str(user_id) and user["role"] != "admin":
-        return jsonify({"error": "Unauthorized"}), 403
-
+    # ✅ Steps 1-3: Issue fetched and creator/admin permission checked by @authorize
+    issue = g.resource
 
     # ✅ Step 4: Handle incoming form data (including image)
     title = request.form.get("title")
@@ -109,14 +270,13 @@ def update_issue(issue_id):
     location = request.form.get("location")
     image_file = request.files.get("image")
 
-    image_url = issue.get("image_url", "")
-
-    if image_file:
-        try:
-            upload_result = cloudinary.uploader.upload(image_file)
-            image_url = upload_result.get("secure_url", image_url)
-        except Exception as e:
-            return jsonify({"error": "Image upload failed", "details": str(e)}), 500
+    try:
+        image_url = verified_image_url(request.form, "image", "issue", upload_owner(get_jwt_identity())) or issue.get("image_url", "")
+        latitude, longitude = parse_coordinates(request.form)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except RuntimeError as e:
+        return jsonify({"error": "Upload verification failed", "details": str(e)}), 500
 
     # ✅ Step 5: Build update data only from provided fields
     updated_data = {
@@ -125,14 +285,23 @@ def update_issue(issue_id):
         "location": location or issue["location"],
         "image_url": image_url
     }
+    if latitude is not None:
+        updated_data.update({"latitude": latitude, "longitude": longitude})
 
     # ✅ Step 6: Submit the update
     try:
         update_response = supabase.table("issue").update(updated_data).eq("id", issue_id).execute()
-        return jsonify({"message": "Issue updated", "data": update_response.data}), 200
+        issue_geo.upsert(update_response.data or [])
+        invalidate_summary(issue_id, rebase=True)
     except Exception as e:
         return jsonify({"error": "Update failed", "details": str(e)}), 500
 
+    image_pending = bool(image_file and not request.form.get("image_public_id"))
+    if image_pending:
+        upload_in_background(image_file, "issue", set_issue_image(issue_id))
+
+    return jsonify({"message": "Issue updated", "data": update_response.data, "image_pending": image_pending}), 200
+
 
 # ---------------------------------------------------------
 # DELETE /issues/<id> – Delete issue (creator or admin only)
@@ -141,30 +310,17 @@ def update_issue(issue_id):
 @jwt_required()
 def delete_issue(issue_id):
     user_id = get_jwt_identity()
-
-    # Fetch issue and user role
-    issue_response = supabase.table("issue").select("*").eq("id", issue_id).single().execute()
-    issue = issue_response.data
-    user_response = supabase.table("user").select("role").eq("id", user_id).single().execute()
-    user = user_response.data
-
-    if not issue:
-        return jsonify({"error": "Issue not found"}), 404
-
-    if str(issue["created_by"]) != str(user_id) and user["role"] != "admin":
-        return jsonify({"error": "Unauthorized"}), 403
-
     try:
-        # 1. Delete related upvotes
-        supabase.table("upvote").delete().eq("issue_id", issue_id).execute()
-
-        # 2. Delete related comments (optional, if you have a comment table with issue_id FK)
-        supabase.table("comment").delete().eq("issue_id", issue_id).execute()
-
-        supabase.table("summary").delete().eq("issue_id", issue_id).execute()
-
-        # 3. Delete issue
-        supabase.table("issue").delete().eq("id", issue_id).execute()
+        # Creator/admin check, upvotes, comments, summary and the issue go in
+        # one transactional RPC
+        res = supabase.rpc("delete_issues", {"p_issue_ids": [issue_id], "p_user_id": user_id}).execute()
+        if not res.data:
+            # Nothing deleted: tell a missing issue from a forbidden one
+            if not load_issue(issue_id):
+                return jsonify({"error": "Issue not found"}), 404
+            return jsonify({"error": "Unauthorized"}), 403
+        issue_geo.remove([issue_id])
+        invalidate_summary(issue_id)
 
         return jsonify({"message": "Issue deleted"}), 200
 
@@ -1,63 +1,72 @@
 from flask import Blueprint, jsonify
-from supabase import create_client
-from config import Config
-import cohere
+from utils.supabase_utils import supabase
+from utils.concurrency_utils import run_parallel
+from utils.ai_utils import build_summary_input, cache_summary, content_hash, get_cached_summary, load_summary, summary_jobs
 
 summary_bp = Blueprint("summary", __name__)
-supabase = create_client(Config.SUPABASE_URL, Config.SUPABASE_KEY)
-
-co = cohere.Client(Config.COHERE_API_KEY)
 
 
+# ----------------------------------------------------------------
+# GET /issues/<id>/summary – Cached summary (200) or a job id (202)
+# ----------------------------------------------------------------
 @summary_bp.route("/issues/<int:issue_id>/summary", methods=["GET"])
 def get_summary(issue_id):
+    # ✅ Step 0: Serve the cached summary if nothing was invalidated since
+    cached = get_cached_summary(issue_id)
+    if cached:
+        return jsonify(cached), 200
+
     # ✅ Step 1: Get issue and comments
     try:
-        issue_res = supabase.table("issue").select("title, description").eq("id", issue_id).single().execute()
-        comment_res = supabase.table("comment").select("text").eq("issue_id", issue_id).execute()
+        # Issue, comments and the stored summary are fetched in parallel
+        issue_res, comment_res, stored = run_parallel(
+            lambda: supabase.table("issue").select("title, description").eq("id", issue_id).limit(1).execute(),
+            lambda: supabase.table("comment").select("id, text").eq("issue_id", issue_id).order("id").execute(),
+            lambda: load_summary(issue_id)
+        )
 
         if not issue_res.data:
             return jsonify({"error": "Issue not found"}), 404
 
-        issue = issue_res.data
+        issue = issue_res.data[0]
         comments = comment_res.data or []
 
-        combined_text = f"Issue: {issue['title']}\nDescription: {issue['description']}\n\nComments:\n"
-        combined_text += "\n".join([c["text"] for c in comments])
+        # ✅ Step 2: Reuse the stored summary if the content is unchanged
+        digest = content_hash(issue, comments)
+        if stored and stored.get("content_hash") == digest:
+            return jsonify(cache_summary(issue_id, stored)), 200
     except Exception as e:
         return jsonify({"error": "Failed to fetch issue or comments", "details": str(e)}), 500
 
-    # ✅ Step 2.5: Add fallback filler text if too short
-    if len(combined_text) < 250:
-        filler = f"""This is a discussion around a community issue titled: "{issue['title']}".\n\n"""
-        filler += f"Description: {issue['description']}\nkdlsj; f;kjdjffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffff\nCommunity Comments:\n"
-        if comments:
-            for c in comments:
-                filler += f"- {c['text']}\n"
-        else:
-            filler += "- No comments have been added yet.\n"
-        combined_text = filler
-
+    # Only comments newer than the stored summary are sent when possible
+    combined_text = build_summary_input(issue, comments, stored)
     if len(combined_text) < 250:
         return jsonify({"error": "Not enough content to summarize. Add more description or comments."}), 400
 
-    # ✅ Step 3: Generate summary with Cohere
+    # ✅ Step 3: Generate the summary in the background
+    last_comment_id = comments[-1]["id"] if comments else 0
     try:
-        response = co.summarize(
-            text=combined_text,
-            length='long',
-            format='paragraph'
-        )
-        summary_text = response.summary.strip()
+        job = summary_jobs.submit(issue_id, digest, combined_text, last_comment_id)
     except Exception as e:
-        return jsonify({"error": "Cohere summarization failed", "details": str(e)}), 500
+        return jsonify({"error": "Failed to start summary job", "details": str(e)}), 500
+    return jsonify({**job, "status_url": f"/api/summary-jobs/{job['job_id']}"}), 202
 
-    # ✅ Step 4: Save the summary
+
+# ----------------------------------------------------------------
+# GET /summary-jobs/<job_id> – Poll a background summary job
+# Any worker can answer: job state is stored in the summary_job table
+# ----------------------------------------------------------------
+@summary_bp.route("/summary-jobs/<job_id>", methods=["GET"])
+def get_summary_job(job_id):
     try:
-        saved = supabase.table("summary").insert({
-            "text": summary_text,
-            "issue_id": issue_id
-        }).execute()
-        return jsonify(saved.data[0]), 200
+        job = summary_jobs.get(job_id)
     except Exception as e:
-        return jsonify({"error": "Failed to save summary", "details": str(e)}), 500
+        return jsonify({"error": "Failed to fetch summary job", "details": str(e)}), 500
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+
+    if job["status"] == "done":
+        return jsonify(job), 200
+    if job["status"] == "failed":
+        return jsonify({**job, "error": "Summarization failed", "details": job.get("error")}), 500
+    return jsonify(job), 202
@@ -0,0 +1,45 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from utils.otp_utils import otp_matches
+from utils.supabase_utils import supabase
+from utils.upload_utils import UPLOAD_FOLDERS, sign_upload, upload_owner
+
+upload_bp = Blueprint("upload", __name__)
+
+
+# ----------------------------------------------------------------
+# POST /uploads/sign – Signed params for a direct Cloudinary upload
+# Body: {"kind": "issue" | "profile", "email": ..., "code": ...}
+# Logged-in users get params for their own folder. Signup (verify-otp)
+# uploads a picture before the user can log in, so "profile" also works
+# without a token when email and a valid, unexpired OTP code are sent;
+# the upload is then tied to that email.
+# ----------------------------------------------------------------
+@upload_bp.route("/uploads/sign", methods=["POST"])
+@jwt_required(optional=True)
+def sign_direct_upload():
+    data = request.get_json(silent=True) or {}
+    kind = data.get("kind", "issue")
+    user_id = get_jwt_identity()
+
+    if kind not in UPLOAD_FOLDERS:
+        return jsonify({"error": "Invalid upload kind"}), 400
+
+    try:
+        if user_id:
+            owner = upload_owner(user_id)
+        elif kind != "profile":
+            return jsonify({"error": "Login required"}), 401
+        else:
+            email, code = data.get("email"), data.get("code")
+            if not email or not code:
+                return jsonify({"error": "Login or email and OTP code required"}), 401
+
+            otp = supabase.table("otp").select("code, expires_at").eq("email", email).order("expires_at", desc=True).limit(1).execute().data
+            if not otp or not otp_matches(otp[0], code):
+                return jsonify({"error": "Invalid or expired OTP"}), 400
+            owner = upload_owner(email=email)
+
+        return jsonify(sign_upload(kind, owner)), 200
+    except Exception as e:
+        return jsonify({"error": "Failed to sign upload", "details": str(e)}), 500
@@ -1,34 +1,55 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint, jsonify, request
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from supabase import create_client
 from config import Config
+from utils.supabase_utils import supabase
+from utils.stats_utils import upvote_counts, upvoted_issue_ids
+from utils.upvote_utils import create_upvote_buffer
 
 upvote_bp = Blueprint("upvote", __name__)
-supabase = create_client(Config.SUPABASE_URL, Config.SUPABASE_KEY)
+upvote_buffer = create_upvote_buffer(supabase) if Config.UPVOTE_WRITE_BEHIND else None
+
+
+def apply_buffered(issue_id, user_id, total, has_upvoted):
+    # Add this worker's unflushed toggles to the values read from the database
+    buffered = upvote_buffer.peek(issue_id, int(user_id) if user_id else None) if upvote_buffer else None
+    if not buffered:
+        return total, has_upvoted
+    delta, pending = buffered
+    return max(total + delta, 0), has_upvoted if pending is None else pending
+
 
 # ----------------------------------------------------
 # POST /issues/<id>/upvote – Toggle upvote for issue
+# Optional body: {"upvoted": true|false} sets the state instead of
+# flipping it, so retries are safe and write-behind mode can answer
+# without reading the user's current state
 # ----------------------------------------------------
 @upvote_bp.route("/issues/<int:issue_id>/upvote", methods=["POST"])
 @jwt_required()
 def toggle_upvote(issue_id):
     user_id = get_jwt_identity()
+    data = request.get_json(silent=True) or {}
+    desired = data.get("upvoted")
 
-    try:
-        # Check if upvote already exists
-        existing = supabase.table("upvote").select("id").eq("user_id", user_id).eq("issue_id", issue_id).execute()
+    if desired is not None and not isinstance(desired, bool):
+        return jsonify({"error": "upvoted must be true or false"}), 400
 
-        if existing.data:
-            # Remove upvote
-            supabase.table("upvote").delete().eq("user_id", user_id).eq("issue_id", issue_id).execute()
-            return jsonify({"message": "Upvote removed"}), 200
+    try:
+        if upvote_buffer:
+            # Write-behind: applied in memory now, flushed in batches
+            upvoted, total = upvote_buffer.toggle(issue_id, int(user_id), desired)
+            result = {"upvoted": upvoted, "upvote_count": total}
+        elif desired is not None:
+            res = supabase.rpc("set_upvote", {"p_issue_id": issue_id, "p_user_id": int(user_id), "p_upvoted": desired}).execute()
+            result = res.data
         else:
-            # Add upvote
-            supabase.table("upvote").insert({
-                "user_id": user_id,
-                "issue_id": issue_id
-            }).execute()
-            return jsonify({"message": "Upvoted"}), 201
+            # Atomic toggle; also keeps issue.upvote_count up to date
+            res = supabase.rpc("toggle_upvote", {"p_issue_id": issue_id, "p_user_id": int(user_id)}).execute()
+            result = res.data
+
+        if result["upvoted"]:
+            return jsonify({"message": "Upvoted", "total_upvotes": result["upvote_count"]}), 201
+        return jsonify({"message": "Upvote removed", "total_upvotes": result["upvote_count"]}), 200
 
     except Exception as e:
         return jsonify({"error": "Failed to toggle upvote", "details": str(e)}), 500
@@ -43,9 +64,9 @@ def get_upvotes(issue_id):
     user_id = get_jwt_identity()
 
     try:
-        # Total upvotes
-        response = supabase.table("upvote").select("id", count="exact").eq("issue_id", issue_id).execute()
-        total = response.count or 0
+        # Total upvotes (denormalized counter on issue)
+        response = supabase.table("issue").select("upvote_count").eq("id", issue_id).limit(1).execute()
+        total = response.data[0]["upvote_count"] if response.data else 0
 
         # Check if this user has upvoted
         has_upvoted = False
@@ -53,6 +74,8 @@ def get_upvotes(issue_id):
             check = supabase.table("upvote").select("id").eq("user_id", user_id).eq("issue_id", issue_id).execute()
             has_upvoted = bool(check.data)
 
+        total, has_upvoted = apply_buffered(issue_id, user_id, total, has_upvoted)
+
         return jsonify({
             "issue_id": issue_id,
             "total_upvotes": total,
@@ -61,3 +84,39 @@ def get_upvotes(issue_id):
 
     except Exception as e:
         return jsonify({"error": "Failed to fetch upvotes", "details": str(e)}), 500
+
+
+# ---------------------------------------------------------------
+# POST /issues/upvotes/batch – Counts & user status for many issues
+# Body: {"issue_ids": [1, 2, 3]}
+# ---------------------------------------------------------------
+@upvote_bp.route("/issues/upvotes/batch", methods=["POST"])
+@jwt_required(optional=True)
+def get_upvotes_batch():
+    user_id = get_jwt_identity()
+    data = request.json or {}
+    issue_ids = data.get("issue_ids")
+
+    if not isinstance(issue_ids, list) or not issue_ids:
+        return jsonify({"error": "issue_ids must be a non-empty list"}), 400
+
+    if len(issue_ids) > Config.MAX_PAGE_SIZE:
+        return jsonify({"error": f"At most {Config.MAX_PAGE_SIZE} issue_ids per request"}), 400
+
+    try:
+        issue_ids = list(dict.fromkeys(int(issue_id) for issue_id in issue_ids))
+    except (TypeError, ValueError):
+        return jsonify({"error": "issue_ids must be integers"}), 400
+
+    try:
+        totals = upvote_counts(supabase, issue_ids)
+        upvoted = upvoted_issue_ids(supabase, user_id, issue_ids)
+
+        results = []
+        for issue_id in issue_ids:
+            total, has_upvoted = apply_buffered(issue_id, user_id, totals.get(issue_id, 0), issue_id in upvoted)
+            results.append({"issue_id": issue_id, "total_upvotes": total, "has_upvoted": has_upvoted})
+        return jsonify(results), 200
+
+    except Exception as e:
+        return jsonify({"error": "Failed to fetch upvotes", "details": str(e)}), 500
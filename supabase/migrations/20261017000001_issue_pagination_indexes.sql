@@ -0,0 +1,15 @@
+-- Keyset pagination for GET /api/issues orders by (created_at desc, id desc)
+create index if not exists issue_created_at_id_idx
+    on public.issue (created_at desc, id desc);
+
+-- Server-side filters
+create index if not exists issue_status_created_at_idx
+    on public.issue (status, created_at desc, id desc);
+
+create index if not exists issue_created_by_created_at_idx
+    on public.issue (created_by, created_at desc, id desc);
+
+-- Substring match on the free-text location filter (ilike '%...%')
+create extension if not exists pg_trgm;
+create index if not exists issue_location_trgm_idx
+    on public.issue using gin (location gin_trgm_ops);
@@ -0,0 +1,25 @@
+-- Grouped counters used by GET /api/issues?expand=stats
+
+create index if not exists upvote_issue_id_idx on public.upvote (issue_id);
+create index if not exists upvote_user_id_issue_id_idx on public.upvote (user_id, issue_id);
+create index if not exists comment_issue_id_idx on public.comment (issue_id);
+
+create or replace function public.issue_upvote_counts(p_issue_ids bigint[])
+returns table (issue_id bigint, total bigint)
+language sql stable
+as $$
+    select u.issue_id, count(*)
+    from public.upvote u
+    where u.issue_id = any (p_issue_ids)
+    group by u.issue_id;
+$$;
+
+create or replace function public.issue_comment_counts(p_issue_ids bigint[])
+returns table (issue_id bigint, total bigint)
+language sql stable
+as $$
+    select c.issue_id, count(*)
+    from public.comment c
+    where c.issue_id = any (p_issue_ids)
+    group by c.issue_id;
+$$;
@@ -0,0 +1,11 @@
+-- One cached summary per issue, keyed by a hash of the content it summarises
+
+alter table public.summary add column if not exists content_hash text;
+
+-- Keep only the most recent summary of each issue before enforcing uniqueness
+delete from public.summary s
+using public.summary newer
+where s.issue_id = newer.issue_id
+  and s.id < newer.id;
+
+create unique index if not exists summary_issue_id_key on public.summary (issue_id);
@@ -0,0 +1,3 @@
+-- High-water mark for incremental summaries: the newest comment id covered
+-- by the stored summary (0 = no comments, null = re-summarize everything)
+alter table public.summary add column if not exists last_comment_id bigint;
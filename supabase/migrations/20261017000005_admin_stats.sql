@@ -0,0 +1,42 @@
+-- Everything GET /api/admin/stats shows, in one round trip
+
+create index if not exists comment_is_flagged_idx on public.comment (is_flagged) where is_flagged;
+
+create or replace function public.admin_stats(p_days int default 30, p_top int default 5)
+returns json
+language sql stable
+as $$
+    select json_build_object(
+        'by_status', (
+            select coalesce(json_object_agg(status, total), '{}'::json)
+            from (
+                select status, count(*) as total
+                from public.issue
+                group by status
+            ) s
+        ),
+        'issues_per_day', (
+            select coalesce(json_agg(d order by d.day), '[]'::json)
+            from (
+                select date_trunc('day', created_at)::date as day, count(*) as total
+                from public.issue
+                where created_at >= now() - make_interval(days => p_days)
+                group by 1
+            ) d
+        ),
+        'top_reporters', (
+            select coalesce(json_agg(r order by r.total desc), '[]'::json)
+            from (
+                select i.created_by as user_id, u.name, count(*) as total
+                from public.issue i
+                left join public."user" u on u.id = i.created_by
+                group by i.created_by, u.name
+                order by total desc
+                limit p_top
+            ) r
+        ),
+        'flagged_comments', (
+            select count(*) from public.comment where is_flagged
+        )
+    );
+$$;
@@ -0,0 +1,66 @@
+-- Denormalized upvote counter on issue plus an atomic toggle RPC
+
+-- At most one upvote per user and issue
+delete from public.upvote u
+using public.upvote dup
+where u.issue_id = dup.issue_id
+  and u.user_id = dup.user_id
+  and u.id > dup.id;
+
+create unique index if not exists upvote_issue_id_user_id_key on public.upvote (issue_id, user_id);
+
+alter table public.issue add column if not exists upvote_count integer not null default 0;
+
+update public.issue i
+set upvote_count = c.total
+from (select issue_id, count(*) as total from public.upvote group by issue_id) c
+where c.issue_id = i.id;
+
+-- Keep the counter in step with every insert/delete on upvote
+create or replace function public.upvote_count_sync()
+returns trigger
+language plpgsql
+as $$
+begin
+    if tg_op = 'INSERT' then
+        update public.issue set upvote_count = upvote_count + 1 where id = new.issue_id;
+        return new;
+    else
+        update public.issue set upvote_count = greatest(upvote_count - 1, 0) where id = old.issue_id;
+        return old;
+    end if;
+end;
+$$;
+
+drop trigger if exists upvote_count_sync on public.upvote;
+create trigger upvote_count_sync
+    after insert or delete on public.upvote
+    for each row execute function public.upvote_count_sync();
+
+-- Toggle in a single statement round trip; returns the new state and count
+create or replace function public.toggle_upvote(p_issue_id bigint, p_user_id bigint)
+returns json
+language plpgsql
+as $$
+declare
+    v_upvoted boolean;
+    v_count integer;
+begin
+    delete from public.upvote where issue_id = p_issue_id and user_id = p_user_id;
+
+    if found then
+        v_upvoted := false;
+    else
+        insert into public.upvote (issue_id, user_id)
+        values (p_issue_id, p_user_id)
+        on conflict (issue_id, user_id) do nothing;
+        v_upvoted := true;
+    end if;
+
+    select upvote_count into v_count from public.issue where id = p_issue_id;
+    return json_build_object('upvoted', v_upvoted, 'upvote_count', coalesce(v_count, 0));
+end;
+$$;
+
+-- Superseded by issue.upvote_count
+drop function if exists public.issue_upvote_counts(bigint[]);
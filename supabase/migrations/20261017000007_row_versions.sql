@@ -0,0 +1,60 @@
+-- Row and table versions for ETag / conditional GET support
+
+-- Per-row version: updated_at maintained on every update
+create or replace function public.set_updated_at()
+returns trigger
+language plpgsql
+as $$
+begin
+    new.updated_at := now();
+    return new;
+end;
+$$;
+
+alter table public.issue add column if not exists updated_at timestamptz not null default now();
+alter table public.comment add column if not exists updated_at timestamptz not null default now();
+alter table public."user" add column if not exists updated_at timestamptz not null default now();
+
+drop trigger if exists set_updated_at on public.issue;
+create trigger set_updated_at before update on public.issue
+    for each row execute function public.set_updated_at();
+
+drop trigger if exists set_updated_at on public.comment;
+create trigger set_updated_at before update on public.comment
+    for each row execute function public.set_updated_at();
+
+drop trigger if exists set_updated_at on public."user";
+create trigger set_updated_at before update on public."user"
+    for each row execute function public.set_updated_at();
+
+-- Per-table version: bumped once per statement that changes the table, so
+-- list endpoints can answer If-None-Match with a one-row lookup
+create table if not exists public.table_version (
+    name text primary key,
+    version bigint not null default 0
+);
+
+insert into public.table_version (name) values ('issue'), ('comment'), ('user')
+on conflict (name) do nothing;
+
+create or replace function public.bump_table_version()
+returns trigger
+language plpgsql
+as $$
+begin
+    update public.table_version set version = version + 1 where name = tg_table_name;
+    return null;
+end;
+$$;
+
+drop trigger if exists bump_table_version on public.issue;
+create trigger bump_table_version after insert or update or delete on public.issue
+    for each statement execute function public.bump_table_version();
+
+drop trigger if exists bump_table_version on public.comment;
+create trigger bump_table_version after insert or update or delete on public.comment
+    for each statement execute function public.bump_table_version();
+
+drop trigger if exists bump_table_version on public."user";
+create trigger bump_table_version after insert or update or delete on public."user"
+    for each statement execute function public.bump_table_version();
@@ -0,0 +1,17 @@
+-- Delete issues together with their upvotes, comments and summary in one
+-- transaction (a function call is atomic), in a single round trip
+
+create or replace function public.delete_issues(p_issue_ids bigint[])
+returns table (id bigint)
+language sql
+as $$
+    delete from public.upvote where issue_id = any(p_issue_ids);
+    delete from public.comment where issue_id = any(p_issue_ids);
+    delete from public.summary where issue_id = any(p_issue_ids);
+
+    delete from public.issue where id = any(p_issue_ids)
+    returning id;
+$$;
+
+-- Default execute grants are kept: the backend calls this with the same
+-- SUPABASE_KEY it uses for every table write, which may be the anon key
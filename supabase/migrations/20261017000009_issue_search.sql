@@ -0,0 +1,45 @@
+-- Ranked full-text search over issue title (A), location (B) and description (C)
+
+-- Weighted document of an issue. Indexed as an expression rather than a
+-- stored column so `select *` on issue does not return it.
+create or replace function public.issue_search_document(p_title text, p_location text, p_description text)
+returns tsvector
+language sql immutable
+as $$
+    select setweight(to_tsvector('english', coalesce(p_title, '')), 'A') ||
+           setweight(to_tsvector('english', coalesce(p_location, '')), 'B') ||
+           setweight(to_tsvector('english', coalesce(p_description, '')), 'C');
+$$;
+
+create index if not exists issue_search_document_idx on public.issue
+    using gin (public.issue_search_document(title, location, description));
+
+-- One page of matches, best first, keyset-paged on (rank desc, id desc).
+-- Returns the issue rows plus their rank.
+create or replace function public.search_issues(
+    p_query text,
+    p_status text default null,
+    p_limit int default 20,
+    p_after_rank real default null,
+    p_after_id bigint default null
+)
+returns json
+language sql stable
+as $$
+    with hits as (
+        select i.*, ts_rank(public.issue_search_document(i.title, i.location, i.description), q.query)::real as rank
+        from public.issue i, websearch_to_tsquery('english', p_query) q(query)
+        where public.issue_search_document(i.title, i.location, i.description) @@ q.query
+          and (p_status is null or i.status = p_status)
+    ), page as (
+        select *
+        from hits
+        where p_after_rank is null
+           or rank < p_after_rank
+           or (rank = p_after_rank and id < p_after_id)
+        order by rank desc, id desc
+        limit p_limit
+    )
+    select coalesce(json_agg(page order by page.rank desc, page.id desc), '[]'::json)
+    from page;
+$$;
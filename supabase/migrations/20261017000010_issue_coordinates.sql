@@ -0,0 +1,62 @@
+-- Optional coordinates on issues and a distance-sorted "nearby" RPC
+
+create extension if not exists postgis;
+
+alter table public.issue add column if not exists latitude double precision;
+alter table public.issue add column if not exists longitude double precision;
+
+-- Indexed as an expression (like issue_search_document) so `select *`
+-- on issue keeps returning plain latitude/longitude only
+create or replace function public.issue_point(p_latitude double precision, p_longitude double precision)
+returns geography
+language sql immutable
+as $$
+    select st_setsrid(st_makepoint(p_longitude, p_latitude), 4326)::geography;
+$$;
+
+create index if not exists issue_point_idx on public.issue
+    using gist (public.issue_point(latitude, longitude))
+    where latitude is not null and longitude is not null;
+
+-- One page of issues within p_radius_m of (p_lat, p_lng) and/or inside the
+-- bbox, nearest first, keyset-paged on (distance_m asc, id asc).
+-- Distances are on the sphere, in metres, rounded to 0.1 m.
+create or replace function public.nearby_issues(
+    p_lat double precision,
+    p_lng double precision,
+    p_radius_m double precision default null,
+    p_min_lat double precision default null,
+    p_min_lng double precision default null,
+    p_max_lat double precision default null,
+    p_max_lng double precision default null,
+    p_status text default null,
+    p_limit int default 20,
+    p_after_distance double precision default null,
+    p_after_id bigint default null
+)
+returns json
+language sql stable
+as $$
+    with hits as (
+        select i.*, round(st_distance(public.issue_point(i.latitude, i.longitude), public.issue_point(p_lat, p_lng), false)::numeric, 1)::double precision as distance_m
+        from public.issue i
+        where i.latitude is not null
+          and i.longitude is not null
+          and (p_radius_m is null or st_dwithin(public.issue_point(i.latitude, i.longitude), public.issue_point(p_lat, p_lng), p_radius_m, false))
+          and (p_min_lat is null or (
+                public.issue_point(i.latitude, i.longitude) && st_makeenvelope(p_min_lng, p_min_lat, p_max_lng, p_max_lat, 4326)::geography
+                and i.latitude between p_min_lat and p_max_lat
+                and i.longitude between p_min_lng and p_max_lng))
+          and (p_status is null or i.status = p_status)
+    ), page as (
+        select *
+        from hits
+        where p_after_distance is null
+           or distance_m > p_after_distance
+           or (distance_m = p_after_distance and id > p_after_id)
+        order by distance_m, id
+        limit p_limit
+    )
+    select coalesce(json_agg(page order by page.distance_m, page.id), '[]'::json)
+    from page;
+$$;
@@ -0,0 +1,74 @@
+-- Precomputed "hot" ranking for GET /api/issues?sort=hot
+--
+-- hot_score = log10(max(upvotes + 2 * comments, 1)) + created_epoch / 45000
+-- The recency decay is folded in as a per-issue offset (newer issues start
+-- higher), so a score only changes when its issue gets activity and never
+-- has to be recomputed as time passes.
+
+create or replace function public.issue_hot_score(p_upvotes int, p_comments int, p_created_epoch double precision)
+returns double precision
+language sql immutable
+as $$
+    select log(greatest(p_upvotes + 2 * p_comments, 1)::double precision) + p_created_epoch / 45000;
+$$;
+
+alter table public.issue add column if not exists comment_count integer not null default 0;
+alter table public.issue add column if not exists hot_score double precision not null default 0;
+
+update public.issue i
+set comment_count = c.total
+from (select issue_id, count(*) as total from public.comment group by issue_id) c
+where c.issue_id = i.id;
+
+update public.issue
+set hot_score = public.issue_hot_score(upvote_count, comment_count, extract(epoch from created_at));
+
+create index if not exists issue_hot_score_id_idx
+    on public.issue (hot_score desc, id desc);
+
+create index if not exists issue_status_hot_score_idx
+    on public.issue (status, hot_score desc, id desc);
+
+-- Recompute the score whenever its inputs change; upvote_count is kept by
+-- upvote_count_sync, comment_count by comment_count_sync below
+create or replace function public.set_hot_score()
+returns trigger
+language plpgsql
+as $$
+begin
+    new.hot_score := public.issue_hot_score(
+        new.upvote_count,
+        new.comment_count,
+        extract(epoch from coalesce(new.created_at, now()))
+    );
+    return new;
+end;
+$$;
+
+drop trigger if exists set_hot_score on public.issue;
+create trigger set_hot_score
+    before insert or update of upvote_count, comment_count, created_at on public.issue
+    for each row execute function public.set_hot_score();
+
+create or replace function public.comment_count_sync()
+returns trigger
+language plpgsql
+as $$
+begin
+    if tg_op = 'INSERT' then
+        update public.issue set comment_count = comment_count + 1 where id = new.issue_id;
+        return new;
+    else
+        update public.issue set comment_count = greatest(comment_count - 1, 0) where id = old.issue_id;
+        return old;
+    end if;
+end;
+$$;
+
+drop trigger if exists comment_count_sync on public.comment;
+create trigger comment_count_sync
+    after insert or delete on public.comment
+    for each row execute function public.comment_count_sync();
+
+-- Superseded by issue.comment_count
+drop function if exists public.issue_comment_counts(bigint[]);
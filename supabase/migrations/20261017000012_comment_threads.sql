@@ -0,0 +1,38 @@
+-- Threaded comments: optional parent_id plus a reply counter, and keyset
+-- indexes for paging top-level comments per issue and replies per comment
+
+alter table public.comment add column if not exists parent_id bigint
+    references public.comment (id) on delete cascade;
+alter table public.comment add column if not exists reply_count integer not null default 0;
+
+create index if not exists comment_top_level_idx
+    on public.comment (issue_id, created_at desc, id desc)
+    where parent_id is null;
+
+create index if not exists comment_parent_id_idx
+    on public.comment (parent_id, created_at desc, id desc)
+    where parent_id is not null;
+
+create or replace function public.reply_count_sync()
+returns trigger
+language plpgsql
+as $$
+begin
+    if tg_op = 'INSERT' then
+        if new.parent_id is not null then
+            update public.comment set reply_count = reply_count + 1 where id = new.parent_id;
+        end if;
+        return new;
+    else
+        if old.parent_id is not null then
+            update public.comment set reply_count = greatest(reply_count - 1, 0) where id = old.parent_id;
+        end if;
+        return old;
+    end if;
+end;
+$$;
+
+drop trigger if exists reply_count_sync on public.comment;
+create trigger reply_count_sync
+    after insert or delete on public.comment
+    for each row execute function public.reply_count_sync();
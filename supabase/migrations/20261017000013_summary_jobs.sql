@@ -0,0 +1,139 @@
+-- Background summary jobs, shared by every backend worker: a job started by
+-- one worker can be polled through any other, requests for the same issue
+-- and content share one live job, and the cap on running jobs is global
+
+create table if not exists public.summary_job (
+    id uuid primary key default gen_random_uuid(),
+    issue_id bigint not null references public.issue (id) on delete cascade,
+    content_hash text not null,
+    status text not null default 'pending'
+        check (status in ('pending', 'running', 'done', 'failed')),
+    error text,
+    created_at timestamptz not null default now(),
+    updated_at timestamptz not null default now()
+);
+
+-- At most one live job per issue and content
+create unique index if not exists summary_job_live_key
+    on public.summary_job (issue_id, content_hash)
+    where status in ('pending', 'running');
+
+create index if not exists summary_job_running_idx
+    on public.summary_job (updated_at)
+    where status = 'running';
+
+create index if not exists summary_job_updated_at_idx
+    on public.summary_job (updated_at);
+
+drop trigger if exists set_updated_at on public.summary_job;
+create trigger set_updated_at before update on public.summary_job
+    for each row execute function public.set_updated_at();
+
+-- Returns {"job": <row>, "created": bool}; only the caller that created the
+-- job runs it. Live jobs not updated for p_timeout seconds (their worker
+-- died) are failed first, and finished jobs older than p_ttl are removed.
+create or replace function public.claim_summary_job(
+    p_issue_id bigint,
+    p_content_hash text,
+    p_timeout integer,
+    p_ttl integer
+)
+returns json
+language plpgsql
+as $$
+declare
+    v_job public.summary_job;
+begin
+    update public.summary_job
+    set status = 'failed', error = 'Job timed out'
+    where issue_id = p_issue_id
+      and status in ('pending', 'running')
+      and updated_at < now() - make_interval(secs => p_timeout);
+
+    delete from public.summary_job
+    where updated_at < now() - make_interval(secs => p_ttl)
+      and status in ('done', 'failed');
+
+    insert into public.summary_job (issue_id, content_hash)
+    values (p_issue_id, p_content_hash)
+    on conflict (issue_id, content_hash) where status in ('pending', 'running') do nothing
+    returning * into v_job;
+
+    if found then
+        return json_build_object('job', row_to_json(v_job), 'created', true);
+    end if;
+
+    -- The live job may have finished in the meantime; return it either way
+    select * into v_job
+    from public.summary_job
+    where issue_id = p_issue_id and content_hash = p_content_hash
+    order by created_at desc
+    limit 1;
+
+    return json_build_object('job', row_to_json(v_job), 'created', false);
+end;
+$$;
+
+-- Moves a pending job to running if fewer than p_max_running jobs are
+-- running; returns the job's status afterwards ('pending' = no free slot,
+-- try again later). Waiting refreshes updated_at so the job is not timed out.
+create or replace function public.start_summary_job(
+    p_job_id uuid,
+    p_max_running integer,
+    p_timeout integer
+)
+returns text
+language plpgsql
+as $$
+declare
+    v_status text;
+begin
+    -- Serializes the count-then-start below across workers
+    perform pg_advisory_xact_lock(hashtext('public.summary_job'));
+
+    if (select count(*) from public.summary_job
+        where status = 'running'
+          and updated_at >= now() - make_interval(secs => p_timeout)) < p_max_running then
+        update public.summary_job set status = 'running'
+        where id = p_job_id and status = 'pending';
+    else
+        update public.summary_job set updated_at = now()
+        where id = p_job_id and status = 'pending';
+    end if;
+
+    select status into v_status from public.summary_job where id = p_job_id;
+    return v_status;
+end;
+$$;
+
+-- Stores the summary and marks the job done in one transaction; returns
+-- the saved summary row
+create or replace function public.finish_summary_job(
+    p_job_id uuid,
+    p_text text,
+    p_last_comment_id bigint
+)
+returns json
+language plpgsql
+as $$
+declare
+    v_job public.summary_job;
+    v_summary public.summary;
+begin
+    select * into v_job from public.summary_job where id = p_job_id for update;
+    if not found then
+        raise exception 'summary job % not found', p_job_id;
+    end if;
+
+    insert into public.summary (issue_id, text, content_hash, last_comment_id)
+    values (v_job.issue_id, p_text, v_job.content_hash, p_last_comment_id)
+    on conflict (issue_id) do update
+    set text = excluded.text,
+        content_hash = excluded.content_hash,
+        last_comment_id = excluded.last_comment_id
+    returning * into v_summary;
+
+    update public.summary_job set status = 'done', error = null where id = p_job_id;
+    return row_to_json(v_summary);
+end;
+$$;
@@ -0,0 +1,57 @@
+-- Rebasing a summary (existing content was edited or deleted) resets its
+-- high-water mark so the next refresh re-summarizes the whole thread. A job
+-- started before the rebase must not put its last_comment_id back when it
+-- finishes, whichever worker runs it, so the rebase is recorded on live
+-- jobs and checked when the job is saved.
+
+alter table public.summary_job add column if not exists rebased boolean not null default false;
+
+-- Both functions lock the job row before the summary row, so a rebase and a
+-- finishing job serialize instead of deadlocking
+create or replace function public.rebase_summary(p_issue_id bigint)
+returns void
+language plpgsql
+as $$
+begin
+    update public.summary_job set rebased = true
+    where issue_id = p_issue_id and status in ('pending', 'running');
+
+    update public.summary set last_comment_id = null
+    where issue_id = p_issue_id;
+end;
+$$;
+
+create or replace function public.finish_summary_job(
+    p_job_id uuid,
+    p_text text,
+    p_last_comment_id bigint
+)
+returns json
+language plpgsql
+as $$
+declare
+    v_job public.summary_job;
+    v_summary public.summary;
+begin
+    select * into v_job from public.summary_job where id = p_job_id for update;
+    if not found then
+        raise exception 'summary job % not found', p_job_id;
+    end if;
+
+    insert into public.summary (issue_id, text, content_hash, last_comment_id)
+    values (
+        v_job.issue_id,
+        p_text,
+        v_job.content_hash,
+        case when v_job.rebased then null else p_last_comment_id end
+    )
+    on conflict (issue_id) do update
+    set text = excluded.text,
+        content_hash = excluded.content_hash,
+        last_comment_id = excluded.last_comment_id
+    returning * into v_summary;
+
+    update public.summary_job set status = 'done', error = null where id = p_job_id;
+    return row_to_json(v_summary);
+end;
+$$;
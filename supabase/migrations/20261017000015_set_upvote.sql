@@ -0,0 +1,23 @@
+-- Set (rather than flip) a user's upvote, for clients that send the state
+-- they want: repeating the call is harmless. Returns the state and count
+-- in the same shape as toggle_upvote.
+
+create or replace function public.set_upvote(p_issue_id bigint, p_user_id bigint, p_upvoted boolean)
+returns json
+language plpgsql
+as $$
+declare
+    v_count integer;
+begin
+    if p_upvoted then
+        insert into public.upvote (issue_id, user_id)
+        values (p_issue_id, p_user_id)
+        on conflict (issue_id, user_id) do nothing;
+    else
+        delete from public.upvote where issue_id = p_issue_id and user_id = p_user_id;
+    end if;
+
+    select upvote_count into v_count from public.issue where id = p_issue_id;
+    return json_build_object('upvoted', p_upvoted, 'upvote_count', coalesce(v_count, 0));
+end;
+$$;
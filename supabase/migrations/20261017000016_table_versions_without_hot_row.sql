@@ -0,0 +1,95 @@
+-- Table versions for list ETags without a shared counter row.
+-- The table_version row of a table was updated by every statement that
+-- wrote to it, so all writers queued on one row lock. A table's version is
+-- now the newest updated_at of its rows (inserts and updates), or the time
+-- of its latest delete if that is newer, both read through an index.
+-- updated_at is taken from clock_timestamp() on insert (column default)
+-- and update (trigger) so it follows write order within long transactions;
+-- a write committed after a newer one has been read can still go unnoticed
+-- until the next write to the table.
+
+drop trigger if exists bump_table_version on public.issue;
+drop trigger if exists bump_table_version on public.comment;
+drop trigger if exists bump_table_version on public."user";
+drop function if exists public.bump_table_version();
+drop table if exists public.table_version;
+
+create or replace function public.set_updated_at()
+returns trigger
+language plpgsql
+as $$
+begin
+    new.updated_at := clock_timestamp();
+    return new;
+end;
+$$;
+
+alter table public.issue alter column updated_at set default clock_timestamp();
+alter table public.comment alter column updated_at set default clock_timestamp();
+alter table public."user" alter column updated_at set default clock_timestamp();
+
+create index if not exists issue_updated_at_idx on public.issue (updated_at);
+create index if not exists comment_updated_at_idx on public.comment (updated_at);
+create index if not exists user_updated_at_idx on public."user" (updated_at);
+
+-- One row per delete statement; rows are only ever inserted (no shared
+-- row to lock) and those older than a day are pruned
+create table if not exists public.row_tombstone (
+    table_name text not null,
+    deleted_at timestamptz not null default clock_timestamp()
+);
+
+create index if not exists row_tombstone_table_name_deleted_at_idx
+    on public.row_tombstone (table_name, deleted_at);
+
+create or replace function public.record_delete()
+returns trigger
+language plpgsql
+as $$
+begin
+    insert into public.row_tombstone (table_name) values (tg_table_name);
+    delete from public.row_tombstone
+    where table_name = tg_table_name and deleted_at < now() - interval '1 day';
+    return null;
+end;
+$$;
+
+drop trigger if exists record_delete on public.issue;
+create trigger record_delete after delete on public.issue
+    for each statement execute function public.record_delete();
+
+drop trigger if exists record_delete on public.comment;
+create trigger record_delete after delete on public.comment
+    for each statement execute function public.record_delete();
+
+drop trigger if exists record_delete on public."user";
+create trigger record_delete after delete on public."user"
+    for each statement execute function public.record_delete();
+
+-- {"issue": <version>, ...} for the requested tables
+create or replace function public.table_versions(p_names text[])
+returns json
+language sql
+stable
+as $$
+    select coalesce(json_object_agg(v.name, v.version), '{}'::json)
+    from (
+        select 'issue' as name, greatest(
+            (select max(updated_at) from public.issue),
+            (select max(deleted_at) from public.row_tombstone where table_name = 'issue')
+        ) as version
+        where 'issue' = any(p_names)
+        union all
+        select 'comment', greatest(
+            (select max(updated_at) from public.comment),
+            (select max(deleted_at) from public.row_tombstone where table_name = 'comment')
+        )
+        where 'comment' = any(p_names)
+        union all
+        select 'user', greatest(
+            (select max(updated_at) from public."user"),
+            (select max(deleted_at) from public.row_tombstone where table_name = 'user')
+        )
+        where 'user' = any(p_names)
+    ) v;
+$$;
@@ -0,0 +1,83 @@
+-- delete_issues checks the caller itself when given p_user_id: only the
+-- issue's creator or an admin may delete it, so the delete endpoint needs
+-- one round trip instead of a fetch, a role lookup and the delete.
+-- While it runs, the per-row counter triggers on upvote and comment skip
+-- their updates: the rows they would update are being deleted too.
+
+drop function if exists public.delete_issues(bigint[]);
+
+create or replace function public.delete_issues(p_issue_ids bigint[], p_user_id bigint default null)
+returns table (id bigint)
+language plpgsql
+as $$
+declare
+    v_ids bigint[];
+begin
+    select coalesce(array_agg(i.id), '{}') into v_ids
+    from public.issue i
+    where i.id = any(p_issue_ids)
+      and (p_user_id is null
+           or i.created_by = p_user_id
+           or exists (select 1 from public."user" u where u.id = p_user_id and u.role = 'admin'));
+
+    -- Transaction-local, read by the *_count_sync triggers
+    perform set_config('app.deleting_issues', 'on', true);
+
+    delete from public.upvote u where u.issue_id = any(v_ids);
+    delete from public.comment c where c.issue_id = any(v_ids);
+    delete from public.summary s where s.issue_id = any(v_ids);
+
+    perform set_config('app.deleting_issues', 'off', true);
+
+    return query
+    delete from public.issue i where i.id = any(v_ids)
+    returning i.id;
+end;
+$$;
+
+create or replace function public.upvote_count_sync()
+returns trigger
+language plpgsql
+as $$
+begin
+    if tg_op = 'INSERT' then
+        update public.issue set upvote_count = upvote_count + 1 where id = new.issue_id;
+        return new;
+    elsif current_setting('app.deleting_issues', true) is distinct from 'on' then
+        update public.issue set upvote_count = greatest(upvote_count - 1, 0) where id = old.issue_id;
+    end if;
+    return old;
+end;
+$$;
+
+create or replace function public.comment_count_sync()
+returns trigger
+language plpgsql
+as $$
+begin
+    if tg_op = 'INSERT' then
+        update public.issue set comment_count = comment_count + 1 where id = new.issue_id;
+        return new;
+    elsif current_setting('app.deleting_issues', true) is distinct from 'on' then
+        update public.issue set comment_count = greatest(comment_count - 1, 0) where id = old.issue_id;
+    end if;
+    return old;
+end;
+$$;
+
+create or replace function public.reply_count_sync()
+returns trigger
+language plpgsql
+as $$
+begin
+    if tg_op = 'INSERT' then
+        if new.parent_id is not null then
+            update public.comment set reply_count = reply_count + 1 where id = new.parent_id;
+        end if;
+        return new;
+    elsif old.parent_id is not null and current_setting('app.deleting_issues', true) is distinct from 'on' then
+        update public.comment set reply_count = greatest(reply_count - 1, 0) where id = old.parent_id;
+    end if;
+    return old;
+end;
+$$;
@@ -0,0 +1,7 @@
+import os
+
+# Settings read at import time by config.py; nothing here reaches the network
+os.environ.setdefault("SUPABASE_URL", "http://127.0.0.1:9")
+os.environ.setdefault("SUPABASE_KEY", "test.test.test")
+os.environ.setdefault("JWT_SECRET_KEY", "test")
+os.environ.setdefault("SUMMARIZER_BACKEND", "fake")
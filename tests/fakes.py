@@ -0,0 +1,54 @@
+# Stand-in for the Supabase client: records every query and answers from
+# canned responses keyed by table name or "rpc:<name>". A response may be
+# a list of rows, a callable taking the recorded calls, or a list of
+# Result objects returned one per execute().
+
+
+class Result:
+    def __init__(self, data=None, count=None):
+        self.data = data
+        self.count = count
+
+
+class FakeQuery:
+    def __init__(self, client, name):
+        self.client = client
+        self.name = name
+        self.calls = []
+
+    @property
+    def not_(self):
+        self.calls.append(("not_", (), {}))
+        return self
+
+    def __getattr__(self, attr):
+        def record(*args, **kwargs):
+            self.calls.append((attr, args, kwargs))
+            return self
+        return record
+
+    def execute(self):
+        self.client.log.append((self.name, self.calls))
+        response = self.client.responses.get(self.name)
+        if callable(response):
+            response = response(self.calls)
+        if isinstance(response, list) and response and isinstance(response[0], Result):
+            return response.pop(0)
+        return response if isinstance(response, Result) else Result(response)
+
+
+class FakeSupabase:
+    def __init__(self, **responses):
+        self.responses = responses
+        self.log = []
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+    def rpc(self, name, params=None):
+        query = FakeQuery(self, f"rpc:{name}")
+        query.calls.append(("params", (params,), {}))
+        return query
+
+    def queries(self, name):
+        return [calls for query, calls in self.log if query == name]
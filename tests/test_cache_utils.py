@@ -0,0 +1,48 @@
+import time
+
+from utils.cache_utils import TTLCache
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TTLCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert "b" not in cache
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert len(cache) == 2
+
+
+def test_entries_expire(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    cache = TTLCache(ttl=10)
+    cache.set("default", 1)
+    cache.set("longer", 2, ttl=60)
+    cache.set("falsy", 0)
+
+    now[0] += 11
+    assert cache.get("default") is None
+    assert cache.get("longer") == 2
+    assert "falsy" not in cache
+
+
+def test_falsy_values_are_cached():
+    cache = TTLCache()
+    cache.set("zero", 0)
+    assert "zero" in cache
+    assert cache.get("zero", "missing") == 0
+
+
+def test_delete_and_clear():
+    cache = TTLCache()
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.delete("a")
+    cache.delete("missing")
+    assert cache.get("a") is None and cache.get("b") == 2
+
+    cache.clear()
+    assert len(cache) == 0
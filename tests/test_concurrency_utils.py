@@ -0,0 +1,36 @@
+import pytest
+from utils import concurrency_utils
+from utils.concurrency_utils import per_process, run_parallel
+
+
+@pytest.fixture(params=[False, True], ids=["threads", "gevent"])
+def backend(request, monkeypatch):
+    monkeypatch.setattr(concurrency_utils, "_gevent_patched", lambda: request.param)
+
+
+def test_results_in_argument_order(backend):
+    assert run_parallel(lambda: 1, lambda: 2, lambda: 3) == [1, 2, 3]
+
+
+def test_first_failure_by_position_is_raised_after_all_calls_ran(backend):
+    ran = []
+
+    def fail(message):
+        def call():
+            ran.append(message)
+            raise ValueError(message)
+        return call
+
+    with pytest.raises(ValueError, match="first"):
+        run_parallel(lambda: ran.append("ok"), fail("first"), fail("second"))
+    assert sorted(ran) == ["first", "ok", "second"]
+
+
+def test_per_process_rebuilds_after_fork(monkeypatch):
+    built = []
+    get = per_process(lambda: built.append(object()) or built[-1])
+
+    assert get() is get()
+    monkeypatch.setattr(concurrency_utils.os, "getpid", lambda: -1)
+    assert get() is built[1]
+    assert len(built) == 2
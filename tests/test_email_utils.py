@@ -0,0 +1,126 @@
+import socketserver
+import threading
+import time
+from email.message import EmailMessage
+
+import pytest
+
+from utils.email_utils import EmailQueue
+
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+    # Just enough SMTP for smtplib: no TLS, no auth; the first
+    # `server.fail_first` messages are refused with a 451
+    def reply(self, line):
+        self.wfile.write(line.encode() + b"\r\n")
+
+    def handle(self):
+        self.reply("220 test")
+        while True:
+            line = self.rfile.readline().decode().strip()
+            command = line.split(" ", 1)[0].upper()
+            if not line or command == "QUIT":
+                self.reply("221 bye")
+                return
+            if command == "DATA":
+                self.reply("354 go ahead")
+                body = []
+                while (data := self.rfile.readline()) not in (b".\r\n", b""):
+                    body.append(data.decode())
+                if self.server.fail_first > 0:
+                    self.server.fail_first -= 1
+                    self.reply("451 try again later")
+                else:
+                    self.server.received.append("".join(body))
+                    self.reply("250 ok")
+            else:
+                self.reply("250 ok")
+
+
+@pytest.fixture
+def smtp_server():
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), SMTPHandler)
+    server.daemon_threads = True
+    server.received = []
+    server.fail_first = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def message(to):
+    msg = EmailMessage()
+    msg["From"] = "noreply@example.com"
+    msg["To"] = to
+    msg["Subject"] = "OTP"
+    msg.set_content("123456")
+    return msg
+
+
+def recipients(server):
+    return [line.split(": ", 1)[1].strip() for body in server.received
+            for line in body.splitlines() if line.startswith("To: ")]
+
+
+def make_queue(server, **kwargs):
+    return EmailQueue("127.0.0.1", server.server_address[1], use_tls=False, **kwargs)
+
+
+def test_messages_share_one_connection(smtp_server):
+    email_queue = make_queue(smtp_server)
+    for i in range(3):
+        email_queue.enqueue(message(f"user{i}@example.com"))
+    email_queue.join()
+
+    assert recipients(smtp_server) == ["user0@example.com", "user1@example.com", "user2@example.com"]
+    assert email_queue.stats["sent"] == 3
+    assert email_queue.stats["connections"] == 1
+
+
+def test_retry_does_not_block_later_messages(smtp_server):
+    smtp_server.fail_first = 1
+    email_queue = make_queue(smtp_server, retry_delay=0.3)
+
+    start = time.monotonic()
+    email_queue.enqueue(message("first@example.com"))
+    email_queue.enqueue(message("second@example.com"))
+    while "second@example.com" not in recipients(smtp_server):
+        time.sleep(0.01)
+    # The second message went out while the first waited for its retry
+    assert time.monotonic() - start < 0.3
+    email_queue.join()
+
+    assert recipients(smtp_server) == ["second@example.com", "first@example.com"]
+    assert email_queue.stats["retried"] == 1
+    assert email_queue.stats["sent"] == 2
+
+
+def test_gives_up_after_max_retries(smtp_server):
+    smtp_server.fail_first = 10
+    email_queue = make_queue(smtp_server, max_retries=2, retry_delay=0.01)
+    email_queue.enqueue(message("user@example.com"))
+    email_queue.join()
+
+    assert email_queue.stats["retried"] == 2
+    assert email_queue.stats["failed"] == 1
+    assert email_queue.pending() == 0
+
+
+def test_drain_sends_scheduled_retries_and_stops(smtp_server):
+    smtp_server.fail_first = 1
+    email_queue = make_queue(smtp_server, retry_delay=60)
+    email_queue.enqueue(message("user@example.com"))
+    while email_queue.stats["retried"] == 0:
+        time.sleep(0.01)
+
+    email_queue.drain(timeout=5)
+
+    assert recipients(smtp_server) == ["user@example.com"]
+    assert not email_queue._worker.is_alive()
+
+
+def test_drain_without_worker_returns_immediately():
+    start = time.monotonic()
+    EmailQueue("127.0.0.1", 9).drain(timeout=5)
+    assert time.monotonic() - start < 1
@@ -0,0 +1,102 @@
+import threading
+
+import pytest
+
+from fakes import FakeSupabase
+from utils.geo_utils import GridGeo, GridIndex, after_cursor, parse_bbox
+from utils.pagination_utils import decode_cursor, encode_cursor
+
+# Around Connaught Place, New Delhi; 0.01 degrees of latitude is ~1.1 km
+ISSUES = [
+    {"id": 1, "latitude": 28.6315, "longitude": 77.2167, "status": "Pending"},
+    {"id": 2, "latitude": 28.6325, "longitude": 77.2167, "status": "Resolved"},
+    {"id": 3, "latitude": 28.6415, "longitude": 77.2167, "status": "Pending"},
+    {"id": 4, "latitude": 28.7315, "longitude": 77.2167, "status": "Pending"},
+    {"id": 5, "latitude": 28.6315, "longitude": 77.2167, "status": "Pending"},
+    {"id": 6, "latitude": None, "longitude": None, "status": "Pending"},
+]
+HERE = (28.6315, 77.2167)
+
+
+def ids(results):
+    return [issue["id"] for issue in results]
+
+
+def test_parse_bbox():
+    assert parse_bbox("77.2,28.6,77.3,28.7") == (28.6, 77.2, 28.7, 77.3)
+    for raw in (None, "77.2,28.6,77.3", "a,b,c,d", "77.3,28.6,77.2,28.7", "77.2,-91,77.3,28.7"):
+        with pytest.raises(ValueError):
+            parse_bbox(raw)
+
+
+def test_nearby_orders_by_distance_then_id():
+    index = GridIndex(ISSUES)
+    results = index.nearby(*HERE, radius_m=2000)
+
+    assert len(index) == 5
+    assert ids(results) == [1, 5, 2, 3]
+    assert results[0]["distance_m"] == 0 and 100 < results[2]["distance_m"] < 120
+
+
+def test_nearby_filters_by_status_and_bbox():
+    index = GridIndex(ISSUES)
+
+    assert ids(index.nearby(*HERE, radius_m=2000, status="Resolved")) == [2]
+    assert ids(index.nearby(*HERE, bbox=parse_bbox("77.2,28.6,77.3,28.635"))) == [1, 5, 2]
+    # A bbox spanning more cells than are occupied walks the occupied ones
+    assert ids(index.nearby(*HERE, bbox=parse_bbox("-180,-90,180,90"))) == [1, 5, 2, 3, 4]
+
+
+def test_cursor_pages_through_every_issue_once():
+    index = GridIndex(ISSUES)
+    seen, after = [], None
+    while True:
+        page = index.nearby(*HERE, radius_m=20000, limit=2, after=after)
+        seen += ids(page)
+        if len(page) < 2:
+            break
+        after = decode_cursor(encode_cursor(page[-1], "distance_m"), "distance_m")
+
+    assert seen == [1, 5, 2, 3, 4]
+    assert after_cursor(5.0, 9, (5.0, 8)) and not after_cursor(5.0, 8, (5.0, 8))
+
+
+def test_add_moves_and_remove_drops_an_issue():
+    index = GridIndex(ISSUES)
+    index.add({**ISSUES[3], "latitude": 28.6316})
+    index.remove(2)
+    index.add({**ISSUES[0], "latitude": None})
+
+    assert len(index) == 3
+    assert ids(index.nearby(*HERE, radius_m=2000)) == [5, 4, 3]
+
+
+def test_grid_applies_writes_and_refreshes_in_background():
+    rows = [ISSUES[:2]]
+    client = FakeSupabase(issue=lambda calls: rows[0])
+    geo = GridGeo(client, ttl=0)
+
+    assert ids(geo.nearby(*HERE, radius_m=2000)) == [1, 2]
+
+    # A rebuild that is still loading when a local write arrives
+    loading, release = threading.Event(), threading.Event()
+
+    def slow(calls):
+        loading.set()
+        release.wait(5)
+        return ISSUES[:2]
+    client.responses["issue"] = slow
+
+    # Stale grid: answered from memory while the rebuild starts
+    assert ids(geo.nearby(*HERE, radius_m=2000)) == [1, 2]
+    assert loading.wait(5)
+    geo.upsert([ISSUES[2]])
+    assert ids(geo.nearby(*HERE, radius_m=2000)) == [1, 2, 3]
+
+    release.set()
+    for thread in threading.enumerate():
+        if thread.name == "geo-refresh":
+            thread.join(5)
+    # The write was replayed onto the rebuilt grid
+    geo.ttl = 3600
+    assert ids(geo.nearby(*HERE, radius_m=2000)) == [1, 2, 3]
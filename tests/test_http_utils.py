@@ -0,0 +1,24 @@
+import json
+import zlib
+from utils.http_utils import compress_chunks, encode_pages
+
+
+def test_json_array_is_one_chunk_per_page():
+    pages = [[{"id": 3}, {"id": 2}], [], [{"id": 1}]]
+    chunks = list(encode_pages(iter(pages)))
+
+    assert len(chunks) == 3
+    assert json.loads(b"".join(chunks)) == [{"id": 3}, {"id": 2}, {"id": 1}]
+
+
+def test_empty_json_array():
+    assert b"".join(encode_pages(iter([[]]))) == b"[]"
+
+
+def test_gzip_flushes_once_per_page():
+    pages = [[{"id": n} for n in range(50)], [{"id": 50}]]
+    compressed = list(compress_chunks(encode_pages(iter(pages)), "gzip"))
+
+    # One flush per page, one for the closing bracket, then the gzip trailer
+    assert len(compressed) == 4
+    assert json.loads(zlib.decompress(b"".join(compressed), 31)) == [{"id": n} for n in range(51)]
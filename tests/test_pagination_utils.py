@@ -0,0 +1,61 @@
+import base64
+import json
+
+import pytest
+
+from fakes import FakeSupabase
+from utils.pagination_utils import apply_cursor, decode_cursor, encode_cursor, paginate, parse_limit
+
+
+def raw_cursor(value, row_id):
+    return base64.urlsafe_b64encode(json.dumps([value, row_id]).encode()).decode().rstrip("=")
+
+
+def test_cursor_round_trip():
+    row = {"id": 42, "created_at": "2026-10-17T09:30:00.12345+00:00"}
+    assert decode_cursor(encode_cursor(row)) == ("2026-10-17T09:30:00.12345+00:00", 42)
+
+
+def test_numeric_cursor_round_trip():
+    row = {"id": 7, "hot_score": 41234.567}
+    assert decode_cursor(encode_cursor(row, "hot_score"), "hot_score") == (41234.567, 7)
+
+
+@pytest.mark.parametrize("cursor", ["not-base64!", raw_cursor("2026-10-17T09:30:00", "x"), "W10"])
+def test_malformed_cursor_is_rejected(cursor):
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        decode_cursor(cursor)
+
+
+def test_cursor_cannot_inject_filters():
+    cursor = raw_cursor('x",user_id.eq.1,created_at.lt."z', 1)
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        apply_cursor(FakeSupabase().table("issue").select("*"), cursor)
+
+
+def test_cursor_from_another_sort_is_rejected():
+    new_cursor = encode_cursor({"id": 1, "created_at": "2026-10-17T09:30:00+00:00"})
+    hot_cursor = encode_cursor({"id": 1, "hot_score": 12.5}, "hot_score")
+    with pytest.raises(ValueError):
+        decode_cursor(new_cursor, "hot_score")
+    with pytest.raises(ValueError):
+        decode_cursor(hot_cursor, "created_at")
+
+
+def test_paginate_returns_next_cursor_only_when_more_rows_exist():
+    rows = [{"id": i, "created_at": f"2026-10-17T09:30:{60 - i:02d}+00:00"} for i in range(1, 4)]
+    client = FakeSupabase(issue=rows)
+
+    page, next_cursor = paginate(client.table("issue").select("*"), 2)
+    assert page == rows[:2]
+    assert decode_cursor(next_cursor) == (rows[1]["created_at"], 2)
+
+    page, next_cursor = paginate(client.table("issue").select("*"), 3)
+    assert page == rows and next_cursor is None
+
+
+def test_parse_limit():
+    assert parse_limit(None) == 20
+    assert parse_limit("500") == 100
+    with pytest.raises(ValueError):
+        parse_limit("0")
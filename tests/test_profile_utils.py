@@ -0,0 +1,48 @@
+import threading
+
+from fakes import FakeSupabase
+from utils.profile_utils import ProfileCache, SharedProfileStore
+
+ALICE = {"id": 1, "name": "Alice", "email": "alice@example.com", "role": "user", "picture_url": "", "updated_at": "x"}
+BOB = {"id": 2, "name": "Bob", "email": "bob@example.com", "role": "user", "picture_url": "", "updated_at": "x"}
+
+
+def test_batch_misses_are_loaded_in_one_query():
+    client = FakeSupabase(user=[ALICE, BOB])
+    cache = ProfileCache(client)
+
+    assert cache.get_many([1, 2, 1]) == {1: ALICE, 2: BOB}
+    assert cache.get(2) == BOB
+    assert len(client.queries("user")) == 1
+
+
+def test_shared_store_serves_other_workers(tmp_path):
+    path = str(tmp_path / "profiles.db")
+    first = ProfileCache(FakeSupabase(user=[ALICE]), store=SharedProfileStore(path, ttl=60))
+    first.get(1)
+
+    # Another worker: empty memory cache, same file
+    client = FakeSupabase(user=[])
+    second = ProfileCache(client, store=SharedProfileStore(path, ttl=60))
+    assert second.get(1) == ALICE
+    assert not client.log
+
+    second.invalidate(1)
+    assert second.get(1) is None
+    assert len(client.queries("user")) == 1
+
+
+def test_shared_store_uses_one_connection_across_threads(tmp_path):
+    store = SharedProfileStore(str(tmp_path / "profiles.db"), ttl=60)
+    store.set_many([ALICE])
+    connection = store._conn
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(store.get_many([1]))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == [[ALICE]] * 8
+    assert store._conn is connection
@@ -0,0 +1,54 @@
+from utils.search_utils import InvertedIndex, tokenize
+
+ISSUES = [
+    {"id": 1, "title": "Pothole on Main Road", "location": "Ward 4", "description": "Deep pothole", "status": "Pending"},
+    {"id": 2, "title": "Streetlight out", "location": "Main Road", "description": "Dark at night", "status": "Resolved"},
+    {"id": 3, "title": "Garbage pile", "location": "Ward 4", "description": "Near the main road junction", "status": "Pending"},
+    {"id": 4, "title": "Water leak", "location": "Ward 9", "description": "Pipe burst", "status": "Pending"},
+]
+
+
+def ids(results):
+    return [issue["id"] for issue in results]
+
+
+def test_tokenize():
+    assert tokenize("Main-Road, WARD 4!") == ["main", "road", "ward", "4"]
+    assert tokenize(None) == []
+
+
+def test_title_matches_rank_above_location_and_description():
+    results = InvertedIndex(ISSUES).search("main road")
+    assert ids(results) == [1, 2, 3]
+    assert results[0]["rank"] > results[1]["rank"] > results[2]["rank"]
+
+
+def test_every_term_must_match():
+    index = InvertedIndex(ISSUES)
+    assert ids(index.search("pothole road")) == [1]
+    assert index.search("pothole water") == []
+    assert index.search("") == []
+
+
+def test_status_filter():
+    assert ids(InvertedIndex(ISSUES).search("main road", status="Pending")) == [1, 3]
+
+
+def test_pages_follow_the_cursor():
+    index = InvertedIndex(ISSUES)
+    first = index.search("ward", limit=2)
+    second = index.search("ward", limit=2, after=(first[-1]["rank"], first[-1]["id"]))
+
+    assert len(first) == 2 and len(second) == 1
+    assert set(ids(first + second)) == {1, 3, 4}
+
+
+def test_updates_and_removals():
+    index = InvertedIndex(ISSUES)
+    index.add({**ISSUES[3], "title": "Pothole near school"})
+    assert set(ids(index.search("pothole"))) == {1, 4}
+    assert index.search("water") == []
+
+    index.remove(1)
+    assert ids(index.search("pothole")) == [4]
+    assert len(index) == 3
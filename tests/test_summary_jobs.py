@@ -0,0 +1,122 @@
+import uuid
+
+from fakes import FakeSupabase, Result
+from utils.ai_utils import SummaryJobs, get_cached_summary, invalidate_summary, summary_cache
+
+TEXT = "Issue: Broken streetlight\nDescription: " + "The light on Elm Street has been out for a week. " * 8
+
+
+def job_row(status="pending", issue_id=1):
+    return {"id": str(uuid.uuid4()), "issue_id": issue_id, "content_hash": "abc", "status": status, "error": None}
+
+
+def make_jobs(client):
+    return SummaryJobs(client, max_workers=2, max_running=2, job_ttl=600, job_timeout=300, poll_interval=0.01)
+
+
+def run_to_completion(jobs):
+    jobs._executor().shutdown(wait=True)
+
+
+def params(client, name):
+    return [calls[0][1][0] for calls in client.queries(f"rpc:{name}")]
+
+
+def setup_function():
+    summary_cache.clear()
+
+
+def test_new_job_is_run_and_saved():
+    row = job_row()
+    saved = {"issue_id": 1, "text": "summary", "content_hash": "abc", "last_comment_id": 5}
+    client = FakeSupabase(**{
+        "rpc:claim_summary_job": {"job": row, "created": True},
+        "rpc:start_summary_job": "running",
+        "rpc:finish_summary_job": saved,
+    })
+    jobs = make_jobs(client)
+
+    job = jobs.submit(1, "abc", TEXT, 5)
+    run_to_completion(jobs)
+
+    assert job == {"job_id": row["id"], "issue_id": 1, "status": "pending"}
+    finish = params(client, "finish_summary_job")[0]
+    assert finish["p_job_id"] == row["id"] and finish["p_last_comment_id"] == 5
+    # FakeSummarizer: whitespace-collapsed excerpt of the input
+    assert finish["p_text"].startswith("Issue: Broken streetlight Description:")
+    assert get_cached_summary(1) == saved
+
+
+def test_live_job_from_another_request_is_not_run_again():
+    row = job_row("running")
+    client = FakeSupabase(**{"rpc:claim_summary_job": {"job": row, "created": False}})
+    jobs = make_jobs(client)
+    started = []
+    jobs._executor = lambda: started.append(True)
+
+    assert jobs.submit(1, "abc", TEXT, 5)["status"] == "running"
+    assert not started
+    assert not client.queries("rpc:start_summary_job")
+
+
+def test_job_waits_for_a_free_slot():
+    client = FakeSupabase(**{
+        "rpc:claim_summary_job": {"job": job_row(), "created": True},
+        "rpc:start_summary_job": [Result("pending"), Result("pending"), Result("running")],
+        "rpc:finish_summary_job": {"issue_id": 1, "text": "summary"},
+    })
+    jobs = make_jobs(client)
+
+    jobs.submit(1, "abc", TEXT, 5)
+    run_to_completion(jobs)
+
+    assert len(client.queries("rpc:start_summary_job")) == 3
+    assert len(client.queries("rpc:finish_summary_job")) == 1
+
+
+def test_failure_is_recorded_on_the_job():
+    row = job_row()
+    client = FakeSupabase(**{
+        "rpc:claim_summary_job": {"job": row, "created": True},
+        "rpc:start_summary_job": "failed",
+    })
+    jobs = make_jobs(client)
+
+    jobs.submit(1, "abc", TEXT, 5)
+    run_to_completion(jobs)
+
+    update = client.queries("summary_job")[0]
+    assert update[0] == ("update", ({"status": "failed", "error": "Summary job is failed"},), {})
+    assert not client.queries("rpc:finish_summary_job")
+
+
+def test_result_of_invalidated_content_is_not_cached():
+    client = FakeSupabase(**{
+        "rpc:claim_summary_job": {"job": job_row(), "created": True},
+        "rpc:start_summary_job": lambda calls: invalidate_summary(1) or "running",
+        "rpc:finish_summary_job": {"issue_id": 1, "text": "summary"},
+    })
+    jobs = make_jobs(client)
+
+    jobs.submit(1, "abc", TEXT, 5)
+    run_to_completion(jobs)
+
+    assert len(client.queries("rpc:finish_summary_job")) == 1
+    assert get_cached_summary(1) is None
+
+
+def test_get_reads_the_shared_job_row():
+    row = job_row("done")
+    summary = {"issue_id": 1, "text": "summary"}
+    client = FakeSupabase(summary_job=[row], summary=[summary])
+
+    assert make_jobs(client).get(row["id"]) == {"job_id": row["id"], "issue_id": 1, "status": "done", "summary": summary}
+
+
+def test_get_unknown_or_malformed_job():
+    client = FakeSupabase(summary_job=[])
+    jobs = make_jobs(client)
+
+    assert jobs.get(str(uuid.uuid4())) is None
+    assert jobs.get("not-a-uuid") is None
+    assert len(client.log) == 1
@@ -0,0 +1,47 @@
+import cloudinary
+import cloudinary.utils
+import pytest
+from utils.upload_utils import sign_upload, upload_owner, verified_image_url
+
+
+@pytest.fixture(autouse=True)
+def cloudinary_config():
+    cloudinary.config(cloud_name="demo", api_key="key", api_secret="secret")
+
+
+def uploaded(public_id, version="1700000000"):
+    # The fields a client copies from Cloudinary's upload response
+    signature = cloudinary.utils.api_sign_request({"public_id": public_id, "version": version}, "secret")
+    return {"picture_public_id": public_id, "picture_version": version, "picture_signature": signature}
+
+
+def test_upload_is_signed_into_owner_folder():
+    params = sign_upload("profile", upload_owner(7))
+    assert params["folder"] == "samaj-issue/profiles/user-7"
+
+
+def test_email_owner_ignores_case_and_whitespace():
+    assert upload_owner(email=" A@Example.com") == upload_owner(email="a@example.com")
+    assert upload_owner(email="a@example.com") != upload_owner(email="b@example.com")
+
+
+def test_verified_upload_is_accepted_for_its_owner_only():
+    form = uploaded("samaj-issue/profiles/user-7/abc")
+
+    assert "samaj-issue/profiles/user-7/abc" in verified_image_url(form, "picture", "profile", upload_owner(7))
+    with pytest.raises(ValueError):
+        verified_image_url(form, "picture", "profile", upload_owner(8))
+    with pytest.raises(ValueError):
+        verified_image_url(form, "picture", "issue", upload_owner(7))
+
+
+def test_tampered_signature_is_rejected():
+    form = uploaded("samaj-issue/profiles/user-7/abc")
+    form["picture_version"] = "1700000001"
+
+    with pytest.raises(ValueError):
+        verified_image_url(form, "picture", "profile", upload_owner(7))
+
+
+def test_missing_upload_reference():
+    assert verified_image_url({}, "picture", "profile", upload_owner(7)) is None
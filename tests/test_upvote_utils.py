@@ -0,0 +1,94 @@
+from fakes import FakeSupabase, Result
+from utils.upvote_utils import UpvoteBuffer
+
+
+def make_buffer(client):
+    buffer = UpvoteBuffer(client, flush_interval=3600)
+    buffer._ensure_worker = lambda: None
+    return buffer
+
+
+def test_declared_state_needs_no_per_user_read():
+    client = FakeSupabase(issue=[{"id": 1, "upvote_count": 10}])
+    buffer = make_buffer(client)
+
+    for user_id in (1, 2, 3):
+        assert buffer.toggle(1, user_id, True) == (True, 10 + user_id)
+
+    assert not client.queries("upvote")
+    assert len(client.queries("issue")) == 1
+    assert buffer.peek(1, 2) == (3, True)
+
+
+def test_plain_toggle_reads_user_state_once():
+    client = FakeSupabase(issue=[{"id": 1, "upvote_count": 5}], upvote=[{"id": 99}])
+    buffer = make_buffer(client)
+
+    assert buffer.toggle(1, 7) == (False, 4)
+    assert buffer.toggle(1, 7) == (True, 5)
+    assert len(client.queries("upvote")) == 1
+    # Back where it started: nothing to add to the database count
+    assert buffer.peek(1, 7) == (0, True)
+
+
+def test_flush_writes_batch_and_rereads_counts():
+    # Other workers added 20 upvotes meanwhile; the re-read picks them up
+    client = FakeSupabase(issue=[Result([{"id": 1, "upvote_count": 10}]), Result([{"id": 1, "upvote_count": 32}])])
+    buffer = make_buffer(client)
+    buffer.toggle(1, 1, True)
+    buffer.toggle(1, 2, True)
+    buffer.toggle(1, 3, False)
+
+    assert buffer.flush() == 3
+
+    writes = [calls[0] for calls in client.queries("upvote")]
+    assert writes[0][0] == "delete"
+    assert writes[1] == ("upsert", ([{"issue_id": 1, "user_id": 1}, {"issue_id": 1, "user_id": 2}],),
+                         {"on_conflict": "issue_id,user_id", "ignore_duplicates": True})
+    assert buffer.peek(1) is None
+    assert buffer.toggle(1, 4, True) == (True, 33)
+
+
+def test_failed_flush_keeps_pending_toggles():
+    def fail(calls):
+        raise RuntimeError("connection reset")
+
+    client = FakeSupabase(issue=[{"id": 1, "upvote_count": 0}], upvote=fail)
+    buffer = make_buffer(client)
+    buffer.toggle(1, 1, True)
+
+    assert buffer.flush() == 0
+    assert buffer.pending() == 1
+    assert buffer.peek(1, 1) == (1, True)
+    assert buffer.stats["flush_errors"] == 1
+
+
+def test_flushed_state_is_reread_after_another_worker_changes_it():
+    # Two workers sharing one upvote table
+    rows = set()
+
+    def upvote_table(calls):
+        method, args, kwargs = calls[0]
+        if method == "upsert":
+            rows.update((row["issue_id"], row["user_id"]) for row in args[0])
+        elif method == "delete":
+            removed = next(args[1] for name, args, _ in calls if name == "in_")
+            rows.difference_update((1, user_id) for user_id in removed)
+        else:
+            user_id = [args[1] for name, args, _ in calls if name == "eq"][-1]
+            return [{"id": 1}] if (1, user_id) in rows else []
+        return []
+
+    client = FakeSupabase(issue=lambda calls: [{"id": 1, "upvote_count": len(rows)}], upvote=upvote_table)
+    worker_a, worker_b = make_buffer(client), make_buffer(client)
+
+    assert worker_a.toggle(1, 7) == (True, 1)
+    worker_a.flush()
+    assert worker_b.toggle(1, 7) == (False, 0)
+    worker_b.flush()
+
+    # Worker A must not act on its stale "upvoted" memory and remove again
+    # (its cached count is only refreshed by its next flush)
+    assert worker_a.toggle(1, 7)[0] is True
+    worker_a.flush()
+    assert rows == {(1, 7)}
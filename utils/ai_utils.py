@@ -0,0 +1,291 @@
+import hashlib
+import json
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from config import Config
+from utils.cache_utils import TTLCache
+from utils.concurrency_utils import per_process
+from utils.supabase_utils import supabase
+
+# ------------------------------------------------------------------
+# Issue summary cache
+# Summaries are keyed by a hash of the issue title, description and
+# comment texts. The latest summary per issue is kept in memory (LRU)
+# and persisted in the `summary` table next to its content_hash, so a
+# summary is only regenerated when the underlying content changes.
+# In-memory entries expire after SUMMARY_CACHE_TTL so that changes made
+# through other workers are eventually picked up.
+# Each row also records last_comment_id, the newest comment it covers,
+# so a refresh only has to summarize the comments added after it.
+# ------------------------------------------------------------------
+summary_cache = TTLCache(maxsize=Config.SUMMARY_CACHE_SIZE, ttl=Config.SUMMARY_CACHE_TTL)
+
+# issue_id -> invalidation counter, so a summary generated from content that
+# was invalidated mid-flight is not put back into the memory cache
+_generations = {}
+
+
+def content_hash(issue, comments):
+    payload = json.dumps(
+        [issue["title"], issue["description"], [c["text"] for c in comments]],
+        ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def get_cached_summary(issue_id):
+    return summary_cache.get(issue_id)
+
+
+def cache_summary(issue_id, summary, generation=None):
+    if generation is None or generation == summary_generation(issue_id):
+        summary_cache.set(issue_id, summary)
+    return summary
+
+
+def load_summary(issue_id):
+    res = supabase.table("summary").select("*").eq("issue_id", issue_id).limit(1).execute()
+    return res.data[0] if res.data else None
+
+
+def summary_generation(issue_id):
+    return _generations.get(issue_id, 0)
+
+
+def invalidate_summary(issue_id, rebase=False):
+    # rebase=True when existing content changed (edited/deleted comment or
+    # issue), so the next refresh re-summarizes the whole thread
+    _generations[issue_id] = summary_generation(issue_id) + 1
+    summary_cache.delete(issue_id)
+    if rebase:
+        try:
+            # Also flags live jobs, so one started before this does not restore the mark
+            supabase.rpc("rebase_summary", {"p_issue_id": issue_id}).execute()
+        except Exception as e:
+            print("❌ Failed to reset summary high-water mark:", e)
+
+
+def build_summary_text(issue, comments):
+    combined_text = f"Issue: {issue['title']}\nDescription: {issue['description']}\n\nComments:\n"
+    combined_text += "\n".join([c["text"] for c in comments])
+
+    # Add fallback filler text if too short
+    if len(combined_text) < 250:
+        filler = f"""This is a discussion around a community issue titled: "{issue['title']}".\n\n"""
+        filler += f"Description: {issue['description']}\nkdlsj; f;kjdjffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffff\nCommunity Comments:\n"
+        if comments:
+            for c in comments:
+                filler += f"- {c['text']}\n"
+        else:
+            filler += "- No comments have been added yet.\n"
+        combined_text = filler
+
+    return combined_text
+
+
+def build_incremental_text(issue, previous, new_comments):
+    combined_text = f"Issue: {issue['title']}\n\nSummary so far:\n{previous['text']}\n\nNew comments:\n"
+    combined_text += "\n".join([c["text"] for c in new_comments])
+    return combined_text
+
+
+def build_summary_input(issue, comments, previous=None):
+    # Incremental mode: previous summary + comments added after its high-water mark
+    last_comment_id = previous.get("last_comment_id") if previous else None
+    if last_comment_id is not None:
+        new_comments = [c for c in comments if c["id"] > last_comment_id]
+        if new_comments:
+            combined_text = build_incremental_text(issue, previous, new_comments)
+            if len(combined_text) >= 250:
+                return combined_text
+
+    return build_summary_text(issue, comments)
+
+
+# ------------------------------------------------------------------
+# Summarizer backends
+# SUMMARIZER_BACKEND=cohere (default) calls Cohere's summarize API;
+# SUMMARIZER_BACKEND=fake returns a trimmed excerpt locally, for tests
+# and development without an API key.
+# ------------------------------------------------------------------
+class CohereSummarizer:
+    def __init__(self, api_key):
+        self.api_key = api_key
+        # Built on first use in each worker process
+        self._client = per_process(self._connect)
+
+    def _connect(self):
+        import cohere
+        return cohere.Client(self.api_key)
+
+    def summarize(self, text):
+        response = self._client().summarize(
+            text=text,
+            length='long',
+            format='paragraph'
+        )
+        return response.summary.strip()
+
+
+class FakeSummarizer:
+    def __init__(self, max_chars=200):
+        self.max_chars = max_chars
+
+    def summarize(self, text):
+        return " ".join(text.split())[:self.max_chars].strip()
+
+
+def create_summarizer(backend=None):
+    backend = backend or Config.SUMMARIZER_BACKEND
+    if backend == "fake":
+        return FakeSummarizer()
+    if backend == "cohere":
+        return CohereSummarizer(Config.COHERE_API_KEY)
+    raise ValueError(f"Unknown summarizer backend: {backend}")
+
+
+summarizer = create_summarizer()
+
+# Caps concurrent calls to the summarizer backend across jobs and chunks
+_summarizer_slots = threading.BoundedSemaphore(Config.SUMMARY_MAX_CONCURRENCY)
+
+
+def _summarize(text):
+    with _summarizer_slots:
+        return summarizer.summarize(text)
+
+
+_chunk_executor = per_process(lambda: ThreadPoolExecutor(max_workers=Config.SUMMARY_MAX_CONCURRENCY, thread_name_prefix="summary-chunk"))
+
+
+def split_into_chunks(text, size):
+    # Split on line boundaries into chunks of about `size` characters
+    pieces = []
+    for line in text.splitlines(keepends=True):
+        pieces.extend(line[i:i + size] for i in range(0, len(line), size))
+
+    chunks, current = [], ""
+    for piece in pieces:
+        if current and len(current) + len(piece) > size:
+            chunks.append(current)
+            current = ""
+        current += piece
+    if current:
+        chunks.append(current)
+
+    # The summarize API rejects inputs under 250 characters
+    if len(chunks) > 1 and len(chunks[-1]) < 250:
+        chunks[-2] += chunks.pop()
+    return chunks
+
+
+def summarize_text(text):
+    # Long threads: summarize chunks in parallel, then summarize the merged result
+    if len(text) <= Config.SUMMARY_CHUNK_CHARS:
+        return _summarize(text)
+
+    chunks = split_into_chunks(text, Config.SUMMARY_CHUNK_CHARS)
+    merged = "\n\n".join(_chunk_executor().map(_summarize, chunks))
+    if len(merged) < 250:
+        return merged
+    return summarize_text(merged)
+
+
+# ------------------------------------------------------------------
+# Background summary jobs
+# Job state lives in the summary_job table, so a job can be polled
+# through any worker and requests for the same issue and content share
+# one live job across workers. The worker that creates a job runs it on
+# its local thread pool once start_summary_job grants one of the
+# SUMMARY_MAX_CONCURRENCY running slots (a global cap; chunks of one
+# long thread are summarized in parallel within it). Jobs whose worker
+# died are failed after SUMMARY_JOB_TIMEOUT seconds, and finished jobs
+# are kept for SUMMARY_JOB_TTL seconds so clients can poll for the result.
+# ------------------------------------------------------------------
+def job_view(row):
+    return {"job_id": row["id"], "issue_id": row["issue_id"], "status": row["status"]}
+
+
+class SummaryJobs:
+    def __init__(self, supabase, max_workers, max_running, job_ttl, job_timeout, poll_interval=1.0):
+        self.supabase = supabase
+        self.max_workers = max_workers
+        self.max_running = max_running
+        self.job_ttl = job_ttl
+        self.job_timeout = job_timeout
+        self.poll_interval = poll_interval
+        self._executor = per_process(lambda: ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="summary"))
+
+    def submit(self, issue_id, digest, text, last_comment_id):
+        claimed = self.supabase.rpc("claim_summary_job", {
+            "p_issue_id": issue_id,
+            "p_content_hash": digest,
+            "p_timeout": self.job_timeout,
+            "p_ttl": self.job_ttl
+        }).execute().data
+
+        job = claimed["job"]
+        if claimed["created"]:
+            self._executor().submit(self._run, job["id"], issue_id, text, last_comment_id, summary_generation(issue_id))
+        return job_view(job)
+
+    def get(self, job_id):
+        try:
+            uuid.UUID(job_id)
+        except ValueError:
+            return None
+
+        res = self.supabase.table("summary_job").select("id, issue_id, status, error").eq("id", job_id).limit(1).execute()
+        if not res.data:
+            return None
+
+        row = res.data[0]
+        job = job_view(row)
+        if row["status"] == "done":
+            summary = self.supabase.table("summary").select("*").eq("issue_id", row["issue_id"]).limit(1).execute()
+            job["summary"] = summary.data[0] if summary.data else None
+        elif row["status"] == "failed":
+            job["error"] = row["error"]
+        return job
+
+    def _wait_for_slot(self, job_id):
+        while True:
+            status = self.supabase.rpc("start_summary_job", {
+                "p_job_id": job_id,
+                "p_max_running": self.max_running,
+                "p_timeout": self.job_timeout
+            }).execute().data
+            if status == "running":
+                return
+            if status != "pending":
+                raise RuntimeError(f"Summary job is {status}")
+            time.sleep(self.poll_interval)
+
+    def _run(self, job_id, issue_id, text, last_comment_id, generation):
+        try:
+            self._wait_for_slot(job_id)
+            summary_text = summarize_text(text)
+            # last_comment_id is dropped in SQL if the summary was rebased meanwhile
+            saved = self.supabase.rpc("finish_summary_job", {
+                "p_job_id": job_id,
+                "p_text": summary_text,
+                "p_last_comment_id": last_comment_id
+            }).execute().data
+            cache_summary(issue_id, saved, generation)
+        except Exception as e:
+            print("❌ Summary job failed:", e)
+            try:
+                self.supabase.table("summary_job").update({"status": "failed", "error": str(e)}).eq("id", job_id).execute()
+            except Exception as e:
+                print("❌ Failed to record summary job failure:", e)
+
+
+summary_jobs = SummaryJobs(
+    supabase,
+    max_workers=Config.SUMMARY_MAX_CONCURRENCY,
+    max_running=Config.SUMMARY_MAX_CONCURRENCY,
+    job_ttl=Config.SUMMARY_JOB_TTL,
+    job_timeout=Config.SUMMARY_JOB_TIMEOUT
+)
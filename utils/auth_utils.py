@@ -0,0 +1,74 @@
+import time
+from functools import wraps
+from flask import g, jsonify
+from flask_jwt_extended import jwt_required, get_jwt, get_jwt_identity
+from config import Config
+from utils.supabase_utils import supabase
+from utils.cache_utils import TTLCache
+
+
+# user_id -> role, only consulted for tokens whose "role" claim is missing or too old
+_role_cache = TTLCache(maxsize=4096, ttl=Config.ROLE_CACHE_TTL)
+
+
+# -------------------------------
+# Role resolution
+# The role is embedded in the token at login and trusted for
+# ROLE_CLAIM_TTL seconds after it was issued; older tokens are checked
+# against the database (cached for ROLE_CACHE_TTL per worker). A role
+# change therefore reaches every worker within
+# max(ROLE_CLAIM_TTL, ROLE_CACHE_TTL) seconds, with nothing to invalidate.
+# -------------------------------
+def role_claims(user):
+    return {"role": user.get("role") or "user"}
+
+
+def get_current_role():
+    user_id = str(get_jwt_identity())
+    claims = get_jwt()
+
+    # Fast path: role embedded at login, while the token is still fresh
+    if "role" in claims and time.time() - claims.get("iat", 0) <= Config.ROLE_CLAIM_TTL:
+        return claims["role"]
+
+    role = _role_cache.get(user_id)
+    if role is None:
+        res = supabase.table("user").select("role").eq("id", user_id).limit(1).execute()
+        role = (res.data[0].get("role") if res.data else None) or "user"
+        _role_cache.set(user_id, role)
+    return role
+
+
+# ----------------------------------------------------------------
+# @authorize() – admin only
+# @authorize(loader=...) – owner of the loaded row or admin
+# The loader receives the view kwargs and returns the row (or None);
+# the row is exposed to the view as g.resource.
+# ----------------------------------------------------------------
+def authorize(loader=None, owner_field="user_id", not_found="Not found", message="Unauthorized"):
+    def decorator(fn):
+        @wraps(fn)
+        @jwt_required()
+        def wrapper(*args, **kwargs):
+            resource = None
+            if loader:
+                try:
+                    resource = loader(**kwargs)
+                except Exception as e:
+                    return jsonify({"error": "Failed to fetch resource", "details": str(e)}), 500
+                if not resource:
+                    return jsonify({"error": not_found}), 404
+
+            is_owner = resource is not None and str(resource.get(owner_field)) == str(get_jwt_identity())
+            if not is_owner:
+                try:
+                    is_admin = get_current_role() == "admin"
+                except Exception as e:
+                    return jsonify({"error": "Role lookup failed", "details": str(e)}), 500
+                if not is_admin:
+                    return jsonify({"error": message}), 403
+
+            g.resource = resource
+            return fn(*args, **kwargs)
+        return wrapper
+    return decorator
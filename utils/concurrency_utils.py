@@ -0,0 +1,62 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from config import Config
+
+# Run independent blocking calls (Supabase queries, Cloudinary, password
+# hashing) side by side within one request, so the handler waits for the
+# slowest call instead of the sum of all of them.
+# Under gevent (threading monkey-patched) each call gets its own greenlet,
+# so parallel calls are only bounded by WORKER_CONNECTIONS like the
+# requests themselves; otherwise they share a pool of PARALLEL_WORKERS
+# threads per worker process.
+
+
+def per_process(factory):
+    # Returns a getter for an object built by factory() on first use in each
+    # worker process: threads and pools do not survive fork()
+    lock = threading.Lock()
+    state = {"pid": None, "value": None}
+
+    def get():
+        with lock:
+            if state["pid"] != os.getpid():
+                state["value"], state["pid"] = factory(), os.getpid()
+            return state["value"]
+    return get
+
+
+_executor = per_process(lambda: ThreadPoolExecutor(max_workers=Config.PARALLEL_WORKERS, thread_name_prefix="parallel"))
+
+
+def _gevent_patched():
+    try:
+        from gevent import monkey
+    except ImportError:
+        return False
+    return monkey.is_module_patched("threading")
+
+
+def _capture(call):
+    try:
+        return call(), None
+    except Exception as e:
+        return None, e
+
+
+def run_parallel(*calls):
+    # Returns results in argument order. Every call runs to completion; if any
+    # failed, the exception of the first failing call (by position) is raised,
+    # as it would have been had the calls run one after another.
+    if _gevent_patched():
+        import gevent
+        greenlets = [gevent.spawn(_capture, call) for call in calls]
+        gevent.joinall(greenlets)
+        outcomes = [greenlet.value for greenlet in greenlets]
+    else:
+        outcomes = [future.result() for future in [_executor().submit(_capture, call) for call in calls]]
+
+    for _, error in outcomes:
+        if error:
+            raise error
+    return [result for result, _ in outcomes]
@@ -1,9 +1,17 @@
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from config import Config
+import atexit
+import heapq
+import itertools
+import os
+import queue
 import smtplib
+import threading
+import time
 
-def send_email(to, otp_code):
+
+def build_otp_message(to, otp_code):
     msg = MIMEMultipart("alternative")
     msg['Subject'] = "🔐 Your SAMAJ ISSUE OTP Code"
     msg['From'] = Config.EMAIL_FROM
@@ -35,15 +43,180 @@ def send_email(to, otp_code):
 
     msg.attach(part1)
     msg.attach(part2)
+    return msg
+
+
+# ------------------------------------------------------------------
+# Background delivery queue
+# A single worker thread per process owns one authenticated SMTP
+# connection and reuses it across messages, so request handlers only
+# pay for a queue.put(). The connection is dropped after being idle
+# and re-established (STARTTLS + login) on the next message. Failed
+# messages are scheduled for a later retry (exponential backoff) rather
+# than slept on, so one bad send does not hold up the rest of the queue.
+# At interpreter exit the queue is drained for up to EMAIL_DRAIN_TIMEOUT.
+# ------------------------------------------------------------------
+class EmailQueue:
+    def __init__(self, host, port, username=None, password=None, use_tls=True,
+                 max_retries=3, retry_delay=1.0, idle_timeout=30):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.idle_timeout = idle_timeout
+
+        self.stats = {"queued": 0, "sent": 0, "failed": 0, "retried": 0, "connections": 0}
+        self._queue = queue.Queue()
+        # (due time, seq, msg, attempt) for messages waiting to be retried
+        self._retries = []
+        self._retry_seq = itertools.count()
+        self._draining = False
+        self._lock = threading.Lock()
+        self._server = None
+        self._worker = None
+        self._pid = None
+
+    def enqueue(self, msg):
+        self._ensure_worker()
+        with self._lock:
+            self.stats["queued"] += 1
+        self._queue.put((msg, 0))
+
+    def pending(self):
+        return self._queue.qsize() + len(self._retries)
+
+    def join(self):
+        # Block until every queued message has been sent or given up on
+        self._queue.join()
+
+    def drain(self, timeout=10):
+        # Send what is left (retries are tried straight away) and stop the
+        # worker, waiting at most `timeout` seconds
+        with self._lock:
+            worker = self._worker
+            if worker is None or not worker.is_alive() or self._pid != os.getpid():
+                return
+            self._draining = True
+        self._queue.put(None)
+        worker.join(timeout)
+        if worker.is_alive():
+            print(f"⚠️ Email queue not drained, {self.pending()} message(s) left")
+
+    def _ensure_worker(self):
+        # Threads do not survive fork(), so a worker started in a parent
+        # process (e.g. gunicorn --preload) is restarted in each child
+        with self._lock:
+            if self._worker and self._worker.is_alive() and self._pid == os.getpid():
+                return
+            if self._pid is not None and self._pid != os.getpid():
+                # Inherited from the parent: drop its connection and queue state
+                self._server = None
+                self._queue = queue.Queue()
+                self._retries = []
+                self._draining = False
+            self._pid = os.getpid()
+            self._worker = threading.Thread(target=self._run, name="email-queue", daemon=True)
+            self._worker.start()
+
+    def _connect(self):
+        server = smtplib.SMTP(self.host, self.port, timeout=Config.EMAIL_TIMEOUT)
+        if self.use_tls:
+            server.starttls()
+        if self.username:
+            server.login(self.username, self.password)
+        with self._lock:
+            self.stats["connections"] += 1
+        return server
 
-    try:
-        server = smtplib.SMTP(Config.EMAIL_HOST, Config.EMAIL_PORT)
-        server.starttls()
-        server.login(Config.EMAIL_USERNAME, Config.EMAIL_PASSWORD)
-        server.send_message(msg)
-        server.quit()
-        print("✅ Email sent successfully to", to)
-        return True  # ✅ indicate success
-    except Exception as e:
-        print("❌ Failed to send email:", e)
-        return False  # ❌ indicate failure
+    def _disconnect(self):
+        if self._server is not None:
+            try:
+                self._server.quit()
+            except Exception:
+                pass
+            self._server = None
+
+    def _deliver(self, msg):
+        if self._server is None:
+            self._server = self._connect()
+        try:
+            self._server.send_message(msg)
+        except smtplib.SMTPServerDisconnected:
+            # Server closed the reused connection; reconnect once and resend
+            self._server = self._connect()
+            self._server.send_message(msg)
+
+    def _schedule_retry(self, msg, attempt):
+        due = time.monotonic() + self.retry_delay * (2 ** attempt)
+        with self._lock:
+            heapq.heappush(self._retries, (due, next(self._retry_seq), msg, attempt + 1))
+
+    def _next(self):
+        # (msg, attempt) of the next message to send, or None once drained
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if self._retries and (self._draining or self._retries[0][0] <= now):
+                    _, _, msg, attempt = heapq.heappop(self._retries)
+                    return msg, attempt
+                if self._draining and self._queue.empty():
+                    return None
+                wait = min(self._retries[0][0] - now, self.idle_timeout) if self._retries else self.idle_timeout
+
+            try:
+                item = self._queue.get(timeout=wait)
+            except queue.Empty:
+                if not self._retries:
+                    self._disconnect()
+                continue
+            if item is None:
+                # Wake-up from drain()
+                self._queue.task_done()
+                continue
+            return item
+
+    def _run(self):
+        while True:
+            item = self._next()
+            if item is None:
+                self._disconnect()
+                return
+            msg, attempt = item
+
+            try:
+                self._deliver(msg)
+                with self._lock:
+                    self.stats["sent"] += 1
+                print("✅ Email sent successfully to", msg["To"])
+            except Exception as e:
+                self._disconnect()
+                if attempt < self.max_retries:
+                    with self._lock:
+                        self.stats["retried"] += 1
+                    print(f"⚠️ Email to {msg['To']} failed (attempt {attempt + 1}), retrying:", e)
+                    # Still unfinished: task_done() is called once it is sent or given up on
+                    self._schedule_retry(msg, attempt)
+                    continue
+                with self._lock:
+                    self.stats["failed"] += 1
+                print("❌ Failed to send email:", e)
+            self._queue.task_done()
+
+
+email_queue = EmailQueue(
+    Config.EMAIL_HOST,
+    Config.EMAIL_PORT,
+    Config.EMAIL_USERNAME,
+    Config.EMAIL_PASSWORD,
+    use_tls=Config.EMAIL_USE_TLS,
+    max_retries=Config.EMAIL_MAX_RETRIES
+)
+atexit.register(email_queue.drain, Config.EMAIL_DRAIN_TIMEOUT)
+
+
+def send_email(to, otp_code):
+    # Queue the OTP email for background delivery and return immediately
+    email_queue.enqueue(build_otp_message(to, otp_code))
@@ -0,0 +1,284 @@
+import heapq
+import math
+import threading
+import time
+from collections import defaultdict
+from config import Config
+from utils.pagination_utils import iter_pages
+from utils.supabase_utils import supabase
+
+# ------------------------------------------------------------------
+# Issues near a point
+# Issues may carry latitude/longitude. GEO_BACKEND=postgres (default)
+# calls the nearby_issues RPC, which filters through a GiST index on the
+# issues' PostGIS points. GEO_BACKEND=grid answers from an in-process grid
+# index (issues bucketed into GEO_GRID_CELL_DEG cells), so map views that
+# keep re-querying tiles are served from memory. Writes handled by a worker
+# are applied to its grid straight away; other workers' writes show up
+# when the grid is rebuilt, in the background, every GEO_INDEX_TTL
+# seconds. Both return issue rows with "distance_m" and page by
+# (distance_m asc, id asc).
+# ------------------------------------------------------------------
+EARTH_RADIUS_M = 6371008.8
+METERS_PER_DEGREE = 111320
+
+
+def parse_coordinates(form):
+    # (latitude, longitude) from a form, (None, None) if neither was sent
+    raw_lat, raw_lng = form.get("latitude"), form.get("longitude")
+    if raw_lat in (None, "") and raw_lng in (None, ""):
+        return None, None
+    if raw_lat in (None, "") or raw_lng in (None, ""):
+        raise ValueError("latitude and longitude must be sent together")
+
+    try:
+        lat, lng = float(raw_lat), float(raw_lng)
+    except (TypeError, ValueError):
+        raise ValueError("latitude and longitude must be numbers")
+
+    if not -90 <= lat <= 90 or not -180 <= lng <= 180:
+        raise ValueError("latitude or longitude out of range")
+    return lat, lng
+
+
+def parse_bbox(raw):
+    # "min_lng,min_lat,max_lng,max_lat" -> (min_lat, min_lng, max_lat, max_lng)
+    try:
+        min_lng, min_lat, max_lng, max_lat = (float(v) for v in raw.split(","))
+    except (AttributeError, TypeError, ValueError):
+        raise ValueError("bbox must be min_lng,min_lat,max_lng,max_lat")
+
+    if min_lat > max_lat or min_lng > max_lng:
+        raise ValueError("bbox min values must not exceed max values")
+    if not -90 <= min_lat <= max_lat <= 90 or not -180 <= min_lng <= max_lng <= 180:
+        raise ValueError("bbox out of range")
+    return min_lat, min_lng, max_lat, max_lng
+
+
+def parse_radius(raw):
+    # Radius in metres, None if not sent
+    if raw in (None, ""):
+        return None
+    try:
+        radius = float(raw)
+    except (TypeError, ValueError):
+        raise ValueError("radius must be a number")
+
+    if not 0 < radius <= Config.NEARBY_MAX_RADIUS:
+        raise ValueError(f"radius must be between 0 and {Config.NEARBY_MAX_RADIUS:g} metres")
+    return radius
+
+
+def distance_m(lat1, lng1, lat2, lng2):
+    # Great-circle (haversine) distance, as PostGIS computes it on the sphere
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lng2 - lng1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1, math.sqrt(a)))
+
+
+def radius_bbox(lat, lng, radius_m):
+    # Smallest lat/lng box around a circle (not wrapped at the poles/antimeridian)
+    d_lat = radius_m / METERS_PER_DEGREE
+    d_lng = radius_m / (METERS_PER_DEGREE * max(math.cos(math.radians(lat)), 1e-6))
+    return max(lat - d_lat, -90), max(lng - d_lng, -180), min(lat + d_lat, 90), min(lng + d_lng, 180)
+
+
+def after_cursor(distance, issue_id, after):
+    # True for rows that come after the (distance, id) cursor
+    if after is None:
+        return True
+    after_distance, after_id = after
+    return distance > after_distance or (distance == after_distance and issue_id > after_id)
+
+
+class GridIndex:
+    def __init__(self, issues=(), cell_deg=0.01):
+        self.cell_deg = cell_deg
+        # (lat cell, lng cell) -> [issue, ...]
+        self._cells = defaultdict(list)
+        # issue id -> its cell, to move or drop an issue
+        self._where = {}
+        for issue in issues:
+            self.add(issue)
+
+    def __len__(self):
+        return len(self._where)
+
+    def _cell(self, lat, lng):
+        return math.floor(lat / self.cell_deg), math.floor(lng / self.cell_deg)
+
+    def add(self, issue):
+        # Adds or replaces the issue; one without coordinates is dropped
+        self.remove(issue["id"])
+        if issue.get("latitude") is None or issue.get("longitude") is None:
+            return
+        cell = self._cell(issue["latitude"], issue["longitude"])
+        self._cells[cell].append(issue)
+        self._where[issue["id"]] = cell
+
+    def remove(self, issue_id):
+        cell = self._where.pop(issue_id, None)
+        if cell is None:
+            return
+        issues = [issue for issue in self._cells[cell] if issue["id"] != issue_id]
+        if issues:
+            self._cells[cell] = issues
+        else:
+            del self._cells[cell]
+
+    def _candidates(self, min_lat, min_lng, max_lat, max_lng):
+        lo_lat, lo_lng = self._cell(min_lat, min_lng)
+        hi_lat, hi_lng = self._cell(max_lat, max_lng)
+
+        # Large areas: walking the occupied cells is cheaper than every covered cell
+        if (hi_lat - lo_lat + 1) * (hi_lng - lo_lng + 1) > len(self._cells):
+            cells = (issues for (i, j), issues in self._cells.items()
+                     if lo_lat <= i <= hi_lat and lo_lng <= j <= hi_lng)
+        else:
+            cells = (self._cells.get((i, j), ()) for i in range(lo_lat, hi_lat + 1)
+                     for j in range(lo_lng, hi_lng + 1))
+
+        for issues in cells:
+            for issue in issues:
+                if min_lat <= issue["latitude"] <= max_lat and min_lng <= issue["longitude"] <= max_lng:
+                    yield issue
+
+    def nearby(self, lat, lng, radius_m=None, bbox=None, status=None, limit=20, after=None):
+        box = bbox or radius_bbox(lat, lng, radius_m)
+
+        scored = []
+        for issue in self._candidates(*box):
+            if status and issue.get("status") != status:
+                continue
+            distance = round(distance_m(lat, lng, issue["latitude"], issue["longitude"]), 1)
+            if radius_m is not None and distance > radius_m:
+                continue
+            if after_cursor(distance, issue["id"], after):
+                scored.append((distance, issue["id"], issue))
+
+        return [{**issue, "distance_m": distance} for distance, _, issue in heapq.nsmallest(limit, scored, key=lambda s: s[:2])]
+
+
+class PostgresGeo:
+    def __init__(self, supabase):
+        self.supabase = supabase
+
+    def nearby(self, lat, lng, radius_m=None, bbox=None, status=None, limit=20, after=None):
+        min_lat, min_lng, max_lat, max_lng = bbox or (None, None, None, None)
+        after_distance, after_id = after or (None, None)
+        res = self.supabase.rpc("nearby_issues", {
+            "p_lat": lat,
+            "p_lng": lng,
+            "p_radius_m": radius_m,
+            "p_min_lat": min_lat,
+            "p_min_lng": min_lng,
+            "p_max_lat": max_lat,
+            "p_max_lng": max_lng,
+            "p_status": status,
+            "p_limit": limit,
+            "p_after_distance": after_distance,
+            "p_after_id": after_id
+        }).execute()
+        return res.data or []
+
+    # Nothing is held in memory; the RPC always reads the table
+    def upsert(self, issues):
+        pass
+
+    def remove(self, issue_ids):
+        pass
+
+
+class GridGeo:
+    # Grid over every issue with coordinates. The first request in a worker
+    # builds it; after that a stale grid keeps serving while a background
+    # thread rebuilds it, and writes made meanwhile are replayed onto the
+    # new grid before it is swapped in.
+    def __init__(self, supabase, ttl=60, cell_deg=0.01):
+        self.supabase = supabase
+        self.ttl = ttl
+        self.cell_deg = cell_deg
+        self._index = None
+        self._built_at = 0
+        self._building = False
+        # Writes applied while a build is running, replayed onto its result
+        self._changes = []
+        # Guards the grid and the fields above; the build itself runs outside it
+        self._lock = threading.Lock()
+        self._first_build = threading.Lock()
+
+    def _build(self, raise_errors=False):
+        try:
+            def make_query():
+                return self.supabase.table("issue").select("*").not_.is_("latitude", "null")
+            index = GridIndex((issue for page in iter_pages(make_query, Config.MAX_PAGE_SIZE) for issue in page), self.cell_deg)
+        except Exception as e:
+            # Keep serving the old grid and try again after another ttl
+            with self._lock:
+                self._building, self._changes, self._built_at = False, [], time.monotonic()
+            if raise_errors:
+                raise
+            print("❌ Geo index refresh failed:", e)
+            return
+
+        with self._lock:
+            for change in self._changes:
+                change(index)
+            self._index, self._built_at = index, time.monotonic()
+            self._building, self._changes = False, []
+
+    def _refresh(self):
+        with self._lock:
+            if self._index is not None:
+                if self._building or time.monotonic() - self._built_at <= self.ttl:
+                    return
+                self._building = True
+                threading.Thread(target=self._build, name="geo-refresh", daemon=True).start()
+                return
+
+        # First use in this worker: nothing to serve yet, so build in the request
+        with self._first_build:
+            with self._lock:
+                if self._index is not None:
+                    return
+                self._building = True
+            self._build(raise_errors=True)
+
+    def _apply(self, change):
+        with self._lock:
+            if self._building:
+                self._changes.append(change)
+            if self._index is not None:
+                change(self._index)
+
+    def upsert(self, issues):
+        # Rows as returned by an insert or update of the issue table
+        def change(index):
+            for issue in issues:
+                index.add(issue)
+        self._apply(change)
+
+    def remove(self, issue_ids):
+        def change(index):
+            for issue_id in issue_ids:
+                index.remove(issue_id)
+        self._apply(change)
+
+    def nearby(self, lat, lng, radius_m=None, bbox=None, status=None, limit=20, after=None):
+        self._refresh()
+        with self._lock:
+            return self._index.nearby(lat, lng, radius_m, bbox, status, limit, after)
+
+
+def create_issue_geo(supabase, backend=None):
+    backend = backend or Config.GEO_BACKEND
+    if backend == "postgres":
+        return PostgresGeo(supabase)
+    if backend == "grid":
+        return GridGeo(supabase, ttl=Config.GEO_INDEX_TTL, cell_deg=Config.GEO_GRID_CELL_DEG)
+    raise ValueError(f"Unknown geo backend: {backend}")
+
+
+issue_geo = create_issue_geo(supabase)
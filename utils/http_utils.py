@@ -0,0 +1,121 @@
+import hashlib
+import json
+import zlib
+from flask import request, make_response, Response
+from config import Config
+
+try:
+    import brotli
+except ImportError:  # optional: gzip is used when brotli is not installed
+    brotli = None
+
+# ------------------------------------------------------------------
+# Conditional GET helpers
+# ETags are weak and derived from row/table versions (a row's updated_at,
+# or a table's newest updated_at/delete time from the table_versions RPC),
+# so the 304 decision is made before the body is fetched or serialized.
+# ------------------------------------------------------------------
+
+
+def table_versions(supabase, *tables):
+    res = supabase.rpc("table_versions", {"p_names": list(tables)}).execute()
+    return res.data or {}
+
+
+def make_etag(*parts):
+    payload = json.dumps(parts, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def conditional_response(etag, build, private=False):
+    # build() is only called when the client's copy is stale
+    if request.if_none_match.contains_weak(etag):
+        response = make_response("", 304)
+    else:
+        response = make_response(build())
+        if response.status_code != 200:
+            return response
+
+    response.set_etag(etag, weak=True)
+    response.headers["Cache-Control"] = f"{'private' if private else 'public'}, max-age={Config.HTTP_CACHE_MAX_AGE}, must-revalidate"
+    if private:
+        response.vary.add("Authorization")
+    return response
+
+
+# ------------------------------------------------------------------
+# Streaming list responses
+# Rows are written page by page as they arrive from Supabase, either as
+# a JSON array or as NDJSON (one object per line), and compressed on the
+# fly when the client accepts br or gzip. Only one page is held in
+# memory at a time.
+# ------------------------------------------------------------------
+def wants_stream():
+    return request.args.get("stream", "").lower() in ("1", "true") or wants_ndjson()
+
+
+def wants_ndjson():
+    return request.args.get("format") == "ndjson" or "application/x-ndjson" in request.headers.get("Accept", "")
+
+
+def negotiate_encoding():
+    accepted = request.accept_encodings
+    if brotli is not None and accepted["br"]:
+        return "br"
+    if accepted["gzip"]:
+        return "gzip"
+    return None
+
+
+def encode_pages(pages, ndjson=False):
+    if ndjson:
+        try:
+            for rows in pages:
+                yield "".join(json.dumps(row, default=str) + "\n" for row in rows).encode("utf-8")
+        except Exception as e:
+            print("❌ Streaming failed:", e)
+            yield (json.dumps({"error": "Stream interrupted", "details": str(e)}) + "\n").encode("utf-8")
+        return
+
+    # One chunk per page, so compression flushes once per page. On failure
+    # the array is left unterminated, so clients see invalid JSON
+    prefix = b"["
+    try:
+        for rows in pages:
+            if rows:
+                yield prefix + ",".join(json.dumps(row, default=str) for row in rows).encode("utf-8")
+                prefix = b","
+    except Exception as e:
+        print("❌ Streaming failed:", e)
+        return
+    yield (b"[]" if prefix == b"[" else b"]")
+
+
+def compress_chunks(chunks, encoding):
+    if encoding == "br":
+        compressor = brotli.Compressor()
+        for chunk in chunks:
+            yield compressor.process(chunk) + compressor.flush()
+        yield compressor.finish()
+        return
+
+    # wbits=31 -> gzip container; sync-flush each chunk so it is sent immediately
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+
+def stream_pages(pages):
+    ndjson = wants_ndjson()
+    chunks = encode_pages(pages, ndjson)
+
+    encoding = negotiate_encoding()
+    if encoding:
+        chunks = compress_chunks(chunks, encoding)
+
+    response = Response(chunks, mimetype="application/x-ndjson" if ndjson else "application/json")
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    response.vary.add("Accept-Encoding")
+    return response
@@ -1,4 +1,16 @@
 import random
+from datetime import datetime
 
 def generate_otp():
-    return ''.join(random.choices("0123456789", k=6))
\ No newline at end of file
+    return ''.join(random.choices("0123456789", k=6))
+
+
+def otp_matches(otp_record, code):
+    # ✅ Parse the date using strptime (microseconds included)
+    try:
+        expires_at = datetime.strptime(otp_record['expires_at'], "%Y-%m-%dT%H:%M:%S.%f")
+    except ValueError:
+        # fallback in case microseconds are missing
+        expires_at = datetime.strptime(otp_record['expires_at'], "%Y-%m-%dT%H:%M:%S")
+
+    return otp_record['code'] == code and expires_at >= datetime.utcnow()
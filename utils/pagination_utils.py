@@ -0,0 +1,91 @@
+import base64
+import json
+import re
+from config import Config
+
+# Keyset (cursor) pagination over (<sort_key> desc, id desc).
+# The cursor is an opaque url-safe token holding the sort value and id of the
+# last row of the previous page, so every page is an indexed range scan instead
+# of an OFFSET that grows with the page number.
+# Cursor values are checked against the type of their sort key before they
+# are placed into a PostgREST filter, so a crafted cursor cannot add filters.
+
+TIMESTAMP_RE = re.compile(r"^\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(\.\d{1,6})?(Z|[+-]\d{2}(:?\d{2})?)?$")
+
+
+def is_timestamp(value):
+    return isinstance(value, str) and TIMESTAMP_RE.match(value) is not None
+
+
+def is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+# sort key -> check for the cursor's sort value
+CURSOR_TYPES = {
+    "created_at": is_timestamp,
+    "hot_score": is_number,
+    "rank": is_number,
+    "distance_m": is_number,
+}
+
+
+def parse_limit(raw_limit, default=None):
+    default = default or Config.PAGE_SIZE
+    if raw_limit in (None, ""):
+        return default
+
+    try:
+        limit = int(raw_limit)
+    except (TypeError, ValueError):
+        raise ValueError("limit must be an integer")
+
+    if limit < 1:
+        raise ValueError("limit must be a positive integer")
+    return min(limit, Config.MAX_PAGE_SIZE)
+
+
+def encode_cursor(row, sort_key="created_at"):
+    payload = json.dumps([row[sort_key], row["id"]], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor, sort_key="created_at"):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+    # Also rejects a cursor from another sort order (e.g. sort=new sent with sort=hot)
+    if not CURSOR_TYPES[sort_key](value) or not isinstance(row_id, int) or isinstance(row_id, bool):
+        raise ValueError("Invalid cursor")
+    return value, row_id
+
+
+def apply_cursor(query, cursor, sort_key="created_at"):
+    # Rows strictly after the cursor: sort value lower, or equal with a lower id
+    value, row_id = decode_cursor(cursor, sort_key)
+    return query.or_(f'{sort_key}.lt."{value}",and({sort_key}.eq."{value}",id.lt.{row_id})')
+
+
+def paginate(query, limit, cursor=None, sort_key="created_at"):
+    if cursor:
+        query = apply_cursor(query, cursor, sort_key)
+
+    # Fetch one extra row to know whether another page exists
+    response = query.order(sort_key, desc=True).order("id", desc=True).limit(limit + 1).execute()
+    rows = response.data or []
+
+    next_cursor = encode_cursor(rows[limit - 1], sort_key) if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+
+def iter_pages(make_query, page_size, cursor=None, sort_key="created_at"):
+    # make_query() must return a fresh query builder: builders are mutated by paginate()
+    while True:
+        rows, cursor = paginate(make_query(), page_size, cursor, sort_key)
+        if rows:
+            yield rows
+        if not cursor:
+            return
@@ -0,0 +1,132 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from config import Config
+from utils.cache_utils import TTLCache
+from utils.supabase_utils import supabase
+
+# ------------------------------------------------------------------
+# Read-through user profile cache
+# Public profile fields are cached per worker (LRU, PROFILE_CACHE_TTL).
+# With PROFILE_CACHE_PATH set, a SQLite file on local disk is shared by
+# all workers on the host as a second tier (PROFILE_STORE_TTL), so a
+# profile fetched by one worker is not fetched again by the others.
+# Misses for a whole batch are loaded in one `in_` query. Profile
+# changes delete the entry from this worker's cache and the shared
+# store; other workers pick them up when their entry expires.
+# ------------------------------------------------------------------
+PROFILE_FIELDS = "id, name, email, role, picture_url, updated_at"
+
+
+class SharedProfileStore:
+    # One connection per process, used under a lock: thread-locals would be
+    # per greenlet under gevent workers, i.e. a new connection per request
+    def __init__(self, path, ttl):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+
+    def _connection(self):
+        # sqlite3 connections must not cross fork(); callers hold self._lock
+        if self._conn is None or self._pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=1, isolation_level=None, check_same_thread=False)
+            conn.execute("pragma journal_mode=wal")
+            conn.execute("create table if not exists profile (id integer primary key, data text not null, expires_at real not null)")
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    def get_many(self, user_ids):
+        placeholders = ",".join("?" * len(user_ids))
+        with self._lock:
+            rows = self._connection().execute(
+                f"select data from profile where id in ({placeholders}) and expires_at > ?",
+                [*user_ids, time.time()]
+            ).fetchall()
+        return [json.loads(data) for data, in rows]
+
+    def set_many(self, profiles):
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._connection().executemany(
+                "insert or replace into profile (id, data, expires_at) values (?, ?, ?)",
+                [(p["id"], json.dumps(p), expires_at) for p in profiles]
+            )
+
+    def delete(self, user_id):
+        with self._lock:
+            self._connection().execute("delete from profile where id = ?", (user_id,))
+
+
+class ProfileCache:
+    def __init__(self, supabase, maxsize=4096, ttl=30, store=None):
+        self.supabase = supabase
+        self.memory = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.store = store
+
+    def get_many(self, user_ids):
+        # {user_id: profile} for the ids that exist
+        profiles = {}
+        missing = []
+        for user_id in dict.fromkeys(user_ids):
+            profile = self.memory.get(user_id)
+            if profile is None:
+                missing.append(user_id)
+            else:
+                profiles[user_id] = profile
+
+        if missing and self.store:
+            try:
+                for profile in self.store.get_many(missing):
+                    self.memory.set(profile["id"], profile)
+                    profiles[profile["id"]] = profile
+            except sqlite3.Error as e:
+                print("❌ Profile store read failed:", e)
+            missing = [user_id for user_id in missing if user_id not in profiles]
+
+        if missing:
+            res = self.supabase.table("user").select(PROFILE_FIELDS).in_("id", missing).execute()
+            for profile in res.data or []:
+                self.memory.set(profile["id"], profile)
+                profiles[profile["id"]] = profile
+            if res.data and self.store:
+                try:
+                    self.store.set_many(res.data)
+                except sqlite3.Error as e:
+                    print("❌ Profile store write failed:", e)
+
+        return profiles
+
+    def get(self, user_id):
+        return self.get_many([user_id]).get(user_id)
+
+    def invalidate(self, user_id):
+        self.memory.delete(user_id)
+        if self.store:
+            try:
+                self.store.delete(user_id)
+            except sqlite3.Error as e:
+                print("❌ Profile store delete failed:", e)
+
+
+def create_profile_cache(supabase):
+    store = SharedProfileStore(Config.PROFILE_CACHE_PATH, Config.PROFILE_STORE_TTL) if Config.PROFILE_CACHE_PATH else None
+    return ProfileCache(supabase, maxsize=Config.PROFILE_CACHE_SIZE, ttl=Config.PROFILE_CACHE_TTL, store=store)
+
+
+profile_cache = create_profile_cache(supabase)
+
+
+def get_profile(user_id):
+    return profile_cache.get(int(user_id))
+
+
+def get_profiles(user_ids):
+    return profile_cache.get_many([int(user_id) for user_id in user_ids])
+
+
+def invalidate_profile(user_id):
+    profile_cache.invalidate(int(user_id))
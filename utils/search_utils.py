@@ -0,0 +1,139 @@
+import heapq
+import math
+import re
+import threading
+import time
+from collections import defaultdict
+from config import Config
+from utils.pagination_utils import iter_pages
+
+# ------------------------------------------------------------------
+# Issue search
+# SEARCH_BACKEND=postgres (default) calls the search_issues RPC, which
+# ranks matches of a weighted tsvector over title, location and
+# description, computed by issue_search_document() and served by a GIN
+# expression index (nothing extra is stored on the row).
+# SEARCH_BACKEND=memory ranks with an in-process inverted index instead,
+# for tests and development without Postgres (see
+# benchmarks/search_index.py for its cost at 100k issues).
+# Both return issue rows with a "rank" and page by (rank desc, id desc)
+# so the same cursor format works for either.
+# ------------------------------------------------------------------
+
+# Same relative weights as Postgres' ts_rank defaults for A, B, C
+FIELD_WEIGHTS = {"title": 1.0, "location": 0.4, "description": 0.2}
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text):
+    return TOKEN_RE.findall((text or "").lower())
+
+
+def after_cursor(rank, issue_id, after):
+    # True for rows that come after the (rank, id) cursor
+    if after is None:
+        return True
+    after_rank, after_id = after
+    return rank < after_rank or (rank == after_rank and issue_id < after_id)
+
+
+class InvertedIndex:
+    def __init__(self, issues=()):
+        # term -> {issue_id: weighted term frequency}
+        self._postings = defaultdict(dict)
+        self._issues = {}
+        self._terms = {}
+        for issue in issues:
+            self.add(issue)
+
+    def __len__(self):
+        return len(self._issues)
+
+    def add(self, issue):
+        self.remove(issue["id"])
+        self._issues[issue["id"]] = issue
+        terms = self._terms[issue["id"]] = set()
+        for field, weight in FIELD_WEIGHTS.items():
+            for term in tokenize(issue.get(field)):
+                postings = self._postings[term]
+                postings[issue["id"]] = postings.get(issue["id"], 0) + weight
+                terms.add(term)
+
+    def remove(self, issue_id):
+        self._issues.pop(issue_id, None)
+        for term in self._terms.pop(issue_id, ()):
+            postings = self._postings[term]
+            postings.pop(issue_id, None)
+            if not postings:
+                del self._postings[term]
+
+    def search(self, query, status=None, limit=20, after=None):
+        # Every query term must match, like websearch_to_tsquery's default AND
+        terms = list(dict.fromkeys(tokenize(query)))
+        postings = [self._postings.get(term, {}) for term in terms]
+        if not postings or not all(postings):
+            return []
+
+        postings.sort(key=len)
+        matches = set(postings[0]).intersection(*postings[1:])
+        total = len(self._issues)
+        idfs = [(p, math.log(1 + total / len(p))) for p in postings]
+
+        scored = []
+        for issue_id in matches:
+            if status and self._issues[issue_id].get("status") != status:
+                continue
+            # Term frequency (log-damped, field weighted) x inverse document frequency
+            rank = round(sum(math.log1p(p[issue_id]) * idf for p, idf in idfs), 6)
+            if after_cursor(rank, issue_id, after):
+                scored.append((rank, issue_id))
+
+        return [{**self._issues[issue_id], "rank": rank} for rank, issue_id in heapq.nlargest(limit, scored)]
+
+
+class PostgresSearch:
+    def __init__(self, supabase):
+        self.supabase = supabase
+
+    def search(self, query, status=None, limit=20, after=None):
+        rank, row_id = after or (None, None)
+        res = self.supabase.rpc("search_issues", {
+            "p_query": query,
+            "p_status": status,
+            "p_limit": limit,
+            "p_after_rank": rank,
+            "p_after_id": row_id
+        }).execute()
+        return res.data or []
+
+
+class MemorySearch:
+    # Index over every issue, rebuilt from the table every `ttl` seconds
+    def __init__(self, supabase, ttl=60):
+        self.supabase = supabase
+        self.ttl = ttl
+        self._index = None
+        self._built_at = 0
+        self._lock = threading.Lock()
+
+    def index(self):
+        with self._lock:
+            if self._index is None or time.monotonic() - self._built_at > self.ttl:
+                def make_query():
+                    return self.supabase.table("issue").select("*")
+                issues = [issue for page in iter_pages(make_query, Config.MAX_PAGE_SIZE) for issue in page]
+                self._index = InvertedIndex(issues)
+                self._built_at = time.monotonic()
+            return self._index
+
+    def search(self, query, status=None, limit=20, after=None):
+        return self.index().search(query, status, limit, after)
+
+
+def create_issue_search(supabase, backend=None):
+    backend = backend or Config.SEARCH_BACKEND
+    if backend == "postgres":
+        return PostgresSearch(supabase)
+    if backend == "memory":
+        return MemorySearch(supabase, ttl=Config.SEARCH_INDEX_TTL)
+    raise ValueError(f"Unknown search backend: {backend}")
@@ -0,0 +1,59 @@
+from config import Config
+from utils.cache_utils import TTLCache
+
+# Per-issue counters for list views.
+# Each helper is a single round trip regardless of how many issues are asked
+# for, so a page of N issues no longer fans out into N count queries.
+# Upvote and comment totals come from the denormalized issue.upvote_count
+# and issue.comment_count columns.
+
+
+def upvote_counts(supabase, issue_ids):
+    # Read the counter column maintained by the upvote triggers
+    if not issue_ids:
+        return {}
+    res = supabase.table("issue").select("id, upvote_count").in_("id", list(issue_ids)).execute()
+    return {row["id"]: row["upvote_count"] for row in res.data or []}
+
+
+def upvoted_issue_ids(supabase, user_id, issue_ids):
+    if not user_id or not issue_ids:
+        return set()
+    res = supabase.table("upvote").select("issue_id").eq("user_id", user_id).in_("issue_id", list(issue_ids)).execute()
+    return {row["issue_id"] for row in res.data or []}
+
+
+def attach_issue_stats(supabase, issues, user_id=None):
+    issue_ids = [issue["id"] for issue in issues]
+
+    # Rows fetched with select("*") already carry both counters
+    upvotes = {issue["id"]: issue.get("upvote_count", 0) for issue in issues}
+    comments = {issue["id"]: issue.get("comment_count", 0) for issue in issues}
+    upvoted = upvoted_issue_ids(supabase, user_id, issue_ids)
+
+    for issue in issues:
+        issue["total_upvotes"] = upvotes.get(issue["id"], 0)
+        issue["has_upvoted"] = issue["id"] in upvoted
+        issue["comment_count"] = comments.get(issue["id"], 0)
+    return issues
+
+
+# ------------------------------------------------------------------
+# Admin dashboard stats
+# One RPC computes every breakdown; the result is cached in-process for
+# STATS_CACHE_TTL seconds and dropped early when an admin changes data.
+# ------------------------------------------------------------------
+_admin_stats_cache = TTLCache(maxsize=1, ttl=Config.STATS_CACHE_TTL)
+
+
+def admin_stats(supabase):
+    stats = _admin_stats_cache.get("stats")
+    if stats is None:
+        res = supabase.rpc("admin_stats", {"p_days": Config.STATS_DAYS, "p_top": Config.STATS_TOP_REPORTERS}).execute()
+        stats = res.data
+        _admin_stats_cache.set("stats", stats)
+    return stats
+
+
+def invalidate_admin_stats():
+    _admin_stats_cache.clear()
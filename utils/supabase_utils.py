@@ -0,0 +1,92 @@
+import os
+import random
+import threading
+import time
+import httpx
+from supabase import create_client, ClientOptions
+from werkzeug.local import LocalProxy
+from config import Config
+
+# One Supabase client per worker process, shared by every blueprint.
+# All PostgREST calls go through a single pooled httpx client, so connections
+# (and their TLS sessions) are kept alive and reused across requests.
+# The client is built on first use in each process: importing the app (e.g.
+# in the gunicorn master with preload_app) opens no connections, and pooled
+# sockets are never shared across fork().
+
+# Methods that are safe to resend after the request may have reached the server
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS"}
+RETRY_STATUSES = {502, 503, 504}
+
+
+class RetryTransport(httpx.HTTPTransport):
+    def __init__(self, retries=2, backoff=0.1, **kwargs):
+        super().__init__(**kwargs)
+        self.retries = retries
+        self.backoff = backoff
+
+    def _sleep(self, attempt):
+        # Exponential backoff with jitter: 0.1s, 0.2s, 0.4s ... (+/- 50%)
+        delay = self.backoff * (2 ** attempt)
+        time.sleep(delay * random.uniform(0.5, 1.5))
+
+    def handle_request(self, request):
+        idempotent = request.method in IDEMPOTENT_METHODS
+        attempt = 0
+
+        while True:
+            try:
+                response = super().handle_request(request)
+            except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout):
+                # The request never left this process, always safe to retry
+                if attempt >= self.retries:
+                    raise
+            except (httpx.ReadTimeout, httpx.ReadError, httpx.RemoteProtocolError):
+                if not idempotent or attempt >= self.retries:
+                    raise
+            else:
+                if response.status_code not in RETRY_STATUSES or not idempotent or attempt >= self.retries:
+                    return response
+                response.close()
+
+            self._sleep(attempt)
+            attempt += 1
+
+
+def create_http_client():
+    transport = RetryTransport(
+        retries=Config.SUPABASE_RETRIES,
+        backoff=Config.SUPABASE_RETRY_BACKOFF,
+        limits=httpx.Limits(
+            max_connections=Config.SUPABASE_POOL_SIZE,
+            max_keepalive_connections=Config.SUPABASE_POOL_SIZE,
+            keepalive_expiry=Config.SUPABASE_KEEPALIVE
+        )
+    )
+    timeout = httpx.Timeout(Config.SUPABASE_TIMEOUT, connect=Config.SUPABASE_CONNECT_TIMEOUT)
+    return httpx.Client(transport=transport, timeout=timeout)
+
+
+def create_supabase():
+    # Only the PostgREST side (table/rpc) of the client is used by this app;
+    # it rebinds the shared httpx client's base_url to the REST endpoint.
+    options = ClientOptions(httpx_client=create_http_client())
+    return create_client(Config.SUPABASE_URL, Config.SUPABASE_KEY, options=options)
+
+
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+
+
+def get_supabase():
+    global _client, _client_pid
+    if _client is None or _client_pid != os.getpid():
+        with _client_lock:
+            if _client is None or _client_pid != os.getpid():
+                _client = create_supabase()
+                _client_pid = os.getpid()
+    return _client
+
+
+supabase = LocalProxy(get_supabase)
@@ -0,0 +1,106 @@
+import hashlib
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+import cloudinary
+import cloudinary.uploader
+import cloudinary.utils
+from config import Config
+from utils.concurrency_utils import per_process
+
+# ------------------------------------------------------------------
+# Image uploads
+# Preferred: the client asks POST /api/uploads/sign for signed params,
+# uploads straight to Cloudinary and sends back public_id, version and
+# signature from Cloudinary's response, which are verified here.
+# Fallback: a multipart file is spooled to a temp file and uploaded from
+# a bounded thread pool; the row is patched with the URL when it is done.
+# The signed params restrict direct uploads to image formats and scale
+# anything larger than UPLOAD_MAX_DIMENSION down on arrival; Cloudinary
+# rejects an upload whose params differ from the signed ones.
+# Each upload is signed into a subfolder of its owner (the user, or the
+# email being verified at signup) and only accepted for that owner, so
+# one account's signed upload cannot be attached to another account.
+# Without an API secret, signing and verification raise RuntimeError.
+# ------------------------------------------------------------------
+UPLOAD_FOLDERS = {
+    "issue": "samaj-issue/issues",
+    "profile": "samaj-issue/profiles"
+}
+ALLOWED_FORMATS = "jpg,jpeg,png,webp,gif,heic"
+
+
+def api_secret():
+    secret = cloudinary.config().api_secret
+    if not secret:
+        raise RuntimeError("Cloudinary API secret is not configured")
+    return secret
+
+
+def upload_owner(user_id=None, email=None):
+    if user_id is not None:
+        return f"user-{user_id}"
+    return "email-" + hashlib.sha256(email.strip().lower().encode("utf-8")).hexdigest()[:32]
+
+
+def sign_upload(kind, owner):
+    folder = f"{UPLOAD_FOLDERS[kind]}/{owner}"
+    config = cloudinary.config()
+    size = Config.UPLOAD_MAX_DIMENSION
+    # Cloudinary rejects signed uploads whose timestamp is over an hour old
+    params = {
+        "folder": folder,
+        "allowed_formats": ALLOWED_FORMATS,
+        "transformation": f"c_limit,w_{size},h_{size}",
+        "timestamp": int(time.time())
+    }
+    signature = cloudinary.utils.api_sign_request(params, api_secret())
+
+    return {
+        **params,
+        "signature": signature,
+        "api_key": config.api_key,
+        "cloud_name": config.cloud_name,
+        "upload_url": f"https://api.cloudinary.com/v1_1/{config.cloud_name}/image/upload"
+    }
+
+
+def verified_image_url(form, field, kind, owner):
+    # Returns None when the client did not send a direct upload for `field`
+    public_id = form.get(f"{field}_public_id")
+    if not public_id:
+        return None
+
+    version = form.get(f"{field}_version")
+    signature = form.get(f"{field}_signature")
+    if not public_id.startswith(f"{UPLOAD_FOLDERS[kind]}/{owner}/") or not version or not signature:
+        raise ValueError("Invalid upload reference")
+    api_secret()
+    if not cloudinary.utils.verify_api_response_signature(public_id, version, signature):
+        raise ValueError("Upload signature verification failed")
+
+    url, _ = cloudinary.utils.cloudinary_url(public_id, secure=True, version=version)
+    return url
+
+
+_executor = per_process(lambda: ThreadPoolExecutor(max_workers=Config.UPLOAD_WORKERS, thread_name_prefix="upload"))
+
+
+def _upload(spooled, kind, on_uploaded):
+    try:
+        result = cloudinary.uploader.upload(spooled, folder=UPLOAD_FOLDERS[kind])
+        on_uploaded(result.get("secure_url", ""))
+    except Exception as e:
+        print("❌ Background image upload failed:", e)
+    finally:
+        spooled.close()
+
+
+def upload_in_background(file_storage, kind, on_uploaded):
+    # The request's file stream is closed once the response is sent, so copy
+    # it first (in memory up to 1 MB, on disk beyond that)
+    spooled = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+    shutil.copyfileobj(file_storage.stream, spooled)
+    spooled.seek(0)
+    _executor().submit(_upload, spooled, kind, on_uploaded)
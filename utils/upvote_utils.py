@@ -0,0 +1,188 @@
+import atexit
+import os
+import threading
+import time
+from config import Config
+
+# ------------------------------------------------------------------
+# Write-behind upvotes (UPVOTE_WRITE_BEHIND=true)
+# Toggles are applied to in-process per-issue state and acknowledged
+# straight away; a background thread flushes them to the `upvote` table
+# every UPVOTE_FLUSH_INTERVAL_MS as one batched upsert plus one delete
+# per issue. Flushes are idempotent (insert ... on conflict do nothing,
+# delete of missing rows is a no-op), so a failed flush is simply
+# retried with the same state. Pending toggles are flushed at exit.
+# The issue.upvote_count triggers keep the counter right for batched
+# writes too.
+# Only the unflushed delta is kept per issue: counts are the database
+# counter (re-read after each flush, so other workers' writes show up)
+# plus that delta. A client that sends the state it wants ("upvoted")
+# is acknowledged without any per-user read; a plain toggle has to read
+# the user's current state unless it has an unflushed toggle here.
+# ------------------------------------------------------------------
+class UpvoteBuffer:
+    def __init__(self, supabase, flush_interval=0.25, idle_ttl=300):
+        self.supabase = supabase
+        self.flush_interval = flush_interval
+        self.idle_ttl = idle_ttl
+
+        # issue_id -> {"count": int, "delta": int, "known": {user_id: bool}, "pending": {user_id: bool}, "touched": float}
+        self._issues = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._worker = None
+        self._pid = None
+        self.stats = {"toggles": 0, "flushes": 0, "rows_written": 0, "flush_errors": 0}
+
+    # ---------- request path ----------
+    def toggle(self, issue_id, user_id, upvoted=None):
+        # upvoted=None flips the user's current state; True/False sets it
+        self._ensure_worker()
+
+        with self._lock:
+            state = self._issues.get(issue_id)
+            current = self._known_state(state, user_id)
+            count = state["count"] if state else None
+
+        # Plain toggle by a user this process has not seen: read their state
+        if upvoted is None and current is None:
+            res = self.supabase.table("upvote").select("id").eq("issue_id", issue_id).eq("user_id", user_id).limit(1).execute()
+            current = bool(res.data)
+        # Once per issue (until it goes idle)
+        if count is None:
+            res = self.supabase.table("issue").select("upvote_count").eq("id", issue_id).limit(1).execute()
+            count = res.data[0]["upvote_count"] if res.data else 0
+
+        with self._lock:
+            state = self._issues.setdefault(issue_id, self._new_state(count))
+            # Another request may have toggled in the meantime; trust the in-memory state
+            known = self._known_state(state, user_id)
+            previous = current if known is None else known
+            if upvoted is None:
+                upvoted = not previous
+
+            # Unknown previous state: assume it changes; the re-read after the flush corrects it
+            if previous is None or previous != upvoted:
+                state["delta"] += 1 if upvoted else -1
+            state["pending"][user_id] = upvoted
+            state["known"][user_id] = upvoted
+            state["touched"] = time.monotonic()
+            self.stats["toggles"] += 1
+            return upvoted, max(state["count"] + state["delta"], 0)
+
+    def peek(self, issue_id, user_id=None):
+        # (unflushed count delta, unflushed state of user_id or None), or
+        # None if this process holds nothing unflushed for the issue
+        with self._lock:
+            state = self._issues.get(issue_id)
+            if not state or not state["pending"]:
+                return None
+            return state["delta"], state["pending"].get(user_id)
+
+    def pending(self):
+        with self._lock:
+            return sum(len(state["pending"]) for state in self._issues.values())
+
+    @staticmethod
+    def _new_state(count):
+        return {"count": count, "delta": 0, "known": {}, "pending": {}, "touched": time.monotonic()}
+
+    @staticmethod
+    def _known_state(state, user_id):
+        if not state or user_id is None:
+            return None
+        return state["known"].get(user_id)
+
+    # ---------- flushing ----------
+    def flush(self):
+        with self._flush_lock:
+            with self._lock:
+                batch, deltas = {}, {}
+                for issue_id, state in self._issues.items():
+                    if state["pending"]:
+                        batch[issue_id], deltas[issue_id] = state["pending"], state["delta"]
+                        state["pending"], state["delta"] = {}, 0
+            if not batch:
+                return 0
+
+            try:
+                written = self._write(batch)
+            except Exception as e:
+                # Put the batch back unless a newer toggle superseded it
+                with self._lock:
+                    for issue_id, pending in batch.items():
+                        state = self._issues.setdefault(issue_id, self._new_state(0))
+                        state["pending"] = {**pending, **state["pending"]}
+                        state["delta"] += deltas[issue_id]
+                    self.stats["flush_errors"] += 1
+                print("❌ Upvote flush failed, will retry:", e)
+                return 0
+
+            # Fresh counters include this flush and whatever other workers wrote
+            try:
+                res = self.supabase.table("issue").select("id, upvote_count").in_("id", list(batch)).execute()
+                counts = {row["id"]: row["upvote_count"] for row in res.data or []}
+            except Exception as e:
+                print("❌ Upvote count refresh failed:", e)
+                counts = {}
+
+            with self._lock:
+                for issue_id in batch:
+                    state = self._issues.get(issue_id)
+                    if state:
+                        state["count"] = counts.get(issue_id, state["count"] + deltas[issue_id])
+                        # Other workers may change these rows from now on; only
+                        # toggles still waiting to be flushed stay authoritative
+                        state["known"] = {user_id: upvoted for user_id, upvoted in state["known"].items()
+                                          if user_id not in batch[issue_id] or user_id in state["pending"]}
+                self.stats["flushes"] += 1
+                self.stats["rows_written"] += written
+            return written
+
+    def _write(self, batch):
+        inserts = []
+        written = 0
+        for issue_id, pending in batch.items():
+            removed = [user_id for user_id, upvoted in pending.items() if not upvoted]
+            inserts += [{"issue_id": issue_id, "user_id": user_id} for user_id, upvoted in pending.items() if upvoted]
+            if removed:
+                self.supabase.table("upvote").delete().eq("issue_id", issue_id).in_("user_id", removed).execute()
+                written += len(removed)
+
+        if inserts:
+            self.supabase.table("upvote").upsert(inserts, on_conflict="issue_id,user_id", ignore_duplicates=True).execute()
+            written += len(inserts)
+        return written
+
+    def _evict_idle(self):
+        cutoff = time.monotonic() - self.idle_ttl
+        with self._lock:
+            for issue_id in [i for i, s in self._issues.items() if not s["pending"] and s["touched"] < cutoff]:
+                del self._issues[issue_id]
+
+    def _ensure_worker(self):
+        # Threads do not survive fork(); start the flusher in each worker process
+        with self._lock:
+            if self._worker and self._worker.is_alive() and self._pid == os.getpid():
+                return
+            if self._pid is not None and self._pid != os.getpid():
+                self._issues = {}
+            self._pid = os.getpid()
+            self._worker = threading.Thread(target=self._run, name="upvote-flush", daemon=True)
+            self._worker.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+            self._evict_idle()
+
+
+def create_upvote_buffer(supabase):
+    buffer = UpvoteBuffer(
+        supabase,
+        flush_interval=Config.UPVOTE_FLUSH_INTERVAL_MS / 1000,
+        idle_ttl=Config.UPVOTE_STATE_TTL
+    )
+    atexit.register(buffer.flush)
+    return buffer